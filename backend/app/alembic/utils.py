@@ -0,0 +1,18 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+def drop_invalid_index(index_name: str):
+    """
+    Drops the index if a CREATE INDEX CONCURRENTLY of it was interrupted.
+
+    An interrupted concurrent build leaves an INVALID index behind, which
+    `IF NOT EXISTS` would then silently keep instead of building a usable
+    one. Like the concurrent build, it must run in an autocommit block.
+    """
+    is_valid = op.get_bind().scalar(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": index_name},
+    )
+    if is_valid is False:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
@@ -0,0 +1,119 @@
+"""partition semantic_cache by month
+
+Revision ID: 027c88c70689
+Revises: ddaf5617e4a5
+Create Date: 2024-11-08 11:27:43.906512
+
+"""
+from datetime import date, datetime, UTC
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '027c88c70689'
+down_revision = 'ddaf5617e4a5'
+branch_labels = None
+depends_on = None
+
+
+# `mysql_TTL` is TiDB only, so on PostgreSQL the cache grew forever and the
+# HNSW indexes kept every stale vector. The table is now partitioned by month
+# on created_at: every partition gets its own (small) HNSW index, searches only
+# touch the last month and the `maintain_semantic_cache_partitions` celery beat
+# task creates upcoming partitions and detaches + drops the ones past the TTL.
+HNSW_INDEXES = [
+    ("ix_semantic_cache_query_vec_hnsw", "query_vec"),
+    ("ix_semantic_cache_value_vec_hnsw", "value_vec"),
+]
+
+
+def _month_start(d: date, offset: int = 0) -> date:
+    month = d.year * 12 + d.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _opclass() -> str:
+    if settings.VECTOR_HALF_PRECISION:
+        return "halfvec_cosine_ops"
+    return "vector_cosine_ops"
+
+
+def _drop_indexes():
+    for index_name, _ in HNSW_INDEXES:
+        op.drop_index(index_name, table_name="semantic_cache", if_exists=True)
+
+
+def _create_indexes(hnsw_with: dict):
+    for index_name, column_name in HNSW_INDEXES:
+        op.create_index(
+            index_name,
+            "semantic_cache",
+            [column_name],
+            unique=False,
+            postgresql_using="hnsw",
+            postgresql_with=hnsw_with,
+            postgresql_ops={column_name: _opclass()},
+        )
+
+
+def _rename_old_table():
+    _drop_indexes()
+    op.execute(
+        "ALTER TABLE semantic_cache RENAME CONSTRAINT semantic_cache_pkey "
+        "TO semantic_cache_old_pkey"
+    )
+    op.rename_table("semantic_cache", "semantic_cache_old")
+    # Keep the id sequence (and so the ids) for the new table.
+    op.execute("ALTER SEQUENCE semantic_cache_id_seq OWNED BY NONE")
+
+
+def _finish_new_table():
+    op.execute("ALTER SEQUENCE semantic_cache_id_seq OWNED BY semantic_cache.id")
+    op.drop_table("semantic_cache_old")
+
+
+def upgrade():
+    _rename_old_table()
+    op.execute(
+        "CREATE TABLE semantic_cache ("
+        "LIKE semantic_cache_old INCLUDING DEFAULTS, "
+        "PRIMARY KEY (id, created_at)"
+        ") PARTITION BY RANGE (created_at)"
+    )
+    # Last month is still within the TTL, the default partition catches
+    # anything the maintenance task hasn't created a partition for yet.
+    this_month = _month_start(datetime.now(UTC).date())
+    for offset in (-1, 0, 1):
+        start = _month_start(this_month, offset)
+        op.execute(
+            f"CREATE TABLE semantic_cache_{start:%Y_%m} PARTITION OF semantic_cache "
+            f"FOR VALUES FROM ('{start}') TO ('{_month_start(start, 1)}')"
+        )
+    op.execute("CREATE TABLE semantic_cache_default PARTITION OF semantic_cache DEFAULT")
+    op.execute(
+        "INSERT INTO semantic_cache SELECT * FROM semantic_cache_old "
+        f"WHERE created_at >= '{_month_start(this_month, -1)}'"
+    )
+    # Every partition only holds a month of entries, so the cheap build
+    # parameters are enough.
+    _create_indexes({"m": 16, "ef_construction": 64})
+    _finish_new_table()
+
+
+def downgrade():
+    _rename_old_table()
+    op.execute(
+        "CREATE TABLE semantic_cache ("
+        "LIKE semantic_cache_old INCLUDING DEFAULTS, "
+        "PRIMARY KEY (id)"
+        ")"
+    )
+    op.execute("INSERT INTO semantic_cache SELECT * FROM semantic_cache_old")
+    _create_indexes({"m": 24, "ef_construction": 128})
+    _finish_new_table()
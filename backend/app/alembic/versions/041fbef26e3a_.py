@@ -7,9 +7,7 @@ Create Date: 2024-08-19 08:20:13.695891
 """
 
 from alembic import op
-import sqlalchemy as sa
 # from sqlalchemy.dialects.mysql import DATETIME
-from sqlalchemy.dialects.postgresql import TIMESTAMP
 
 
 
@@ -21,36 +19,20 @@ depends_on = None
 
 
 def upgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column(
-        "site_settings",
-        "created_at",
-        existing_type=TIMESTAMP(timezone=True),
-        server_default=sa.text("CURRENT_TIMESTAMP"),
-        nullable=False,
+    # Both columns are changed in one ALTER TABLE, so the table lock is taken
+    # and the NOT NULL check scans the table only once.
+    op.execute(
+        "ALTER TABLE site_settings "
+        "ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP, "
+        "ALTER COLUMN created_at SET NOT NULL, "
+        "ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP, "
+        "ALTER COLUMN updated_at SET NOT NULL"
     )
-    op.alter_column(
-        "site_settings",
-        "updated_at",
-        existing_type=TIMESTAMP(timezone=True),
-        server_default=sa.text("CURRENT_TIMESTAMP"),
-        nullable=False,
-    )
-    # ### end Alembic commands ###
 
 
 def downgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column(
-        "site_settings",
-        "created_at",
-        existing_type=TIMESTAMP(timezone=True),
-        nullable=False,
-    )
-    op.alter_column(
-        "site_settings",
-        "updated_at",
-        existing_type=TIMESTAMP(timezone=True),
-        nullable=False,
+    op.execute(
+        "ALTER TABLE site_settings "
+        "ALTER COLUMN created_at SET NOT NULL, "
+        "ALTER COLUMN updated_at SET NOT NULL"
     )
-    # ### end Alembic commands ###
@@ -20,6 +20,9 @@ depends_on = None
 
 
 def upgrade():
+    # The vector columns below need pgvector. This used to be done by
+    # app.core.db at import time, on every process start.
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
     # ### commands auto generated by Alembic - please adjust! ###
     op.create_table(
         "chat_engines",
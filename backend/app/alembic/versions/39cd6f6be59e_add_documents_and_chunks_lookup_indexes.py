@@ -0,0 +1,54 @@
+"""add documents and chunks lookup indexes
+
+Revision ID: 39cd6f6be59e
+Revises: 027c88c70689
+Create Date: 2024-11-11 14:02:37.551208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+from app.alembic.utils import drop_invalid_index
+
+
+# revision identifiers, used by Alembic.
+revision = '39cd6f6be59e'
+down_revision = '027c88c70689'
+branch_labels = None
+depends_on = None
+
+
+# Per data source index status overviews and pending document pickers filter
+# on (data_source_id, index_status), and chunks are joined to / deleted by
+# their document, none of which had an index.
+INDEXES = [
+    ("ix_documents_data_source_id_index_status", "documents", ["data_source_id", "index_status"]),
+    ("ix_chunks_document_id", "chunks", ["document_id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for index_name, table_name, columns in INDEXES:
+            drop_invalid_index(index_name)
+            op.create_index(
+                index_name,
+                table_name,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _ in reversed(INDEXES):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
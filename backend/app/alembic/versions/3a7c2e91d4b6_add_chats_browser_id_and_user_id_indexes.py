@@ -0,0 +1,54 @@
+"""add chats (browser_id, created_at) and user_id indexes
+
+Revision ID: 3a7c2e91d4b6
+Revises: 8ca573781e31
+Create Date: 2024-11-18 10:12:44.102385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+from app.alembic.utils import drop_invalid_index
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7c2e91d4b6'
+down_revision = '8ca573781e31'
+branch_labels = None
+depends_on = None
+
+
+# The chat list of a browser is filtered by browser_id and paginated by
+# created_at, and the chats of a user are joined on user_id; both scanned the
+# whole table.
+INDEXES = [
+    ("ix_chats_browser_id_created_at", ["browser_id", "created_at"]),
+    ("ix_chats_user_id", ["user_id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            drop_invalid_index(name)
+            op.create_index(
+                name,
+                "chats",
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(
+                name,
+                table_name="chats",
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,49 @@
+"""right size varchar columns
+
+Revision ID: 5572c28f808a
+Revises: 5908560b6a1f
+Create Date: 2024-11-12 10:18:54.017336
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = '5572c28f808a'
+down_revision = '5908560b6a1f'
+branch_labels = None
+depends_on = None
+
+
+# users.hashed_password is left unbounded, its length depends on the password
+# hasher (argon2 hashes are longer than bcrypt's 60 characters).
+COLUMNS = [
+    ("users", "email", 255),
+    ("staff_action_logs", "action", 64),
+    ("staff_action_logs", "target_type", 64),
+]
+
+
+def upgrade():
+    for table_name, column_name, length in COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sqlmodel.sql.sqltypes.AutoString(),
+            type_=sqlmodel.sql.sqltypes.AutoString(length=length),
+            existing_nullable=False,
+        )
+
+
+def downgrade():
+    for table_name, column_name, length in COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sqlmodel.sql.sqltypes.AutoString(length=length),
+            type_=sqlmodel.sql.sqltypes.AutoString(),
+            existing_nullable=False,
+        )
@@ -0,0 +1,54 @@
+"""add hash indexes
+
+Revision ID: 5908560b6a1f
+Revises: 39cd6f6be59e
+Create Date: 2024-11-11 16:45:12.380274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+from app.alembic.utils import drop_invalid_index
+
+
+# revision identifiers, used by Alembic.
+revision = '5908560b6a1f'
+down_revision = '39cd6f6be59e'
+branch_labels = None
+depends_on = None
+
+
+# Content hashes are used for "already ingested?" checks. Neither index is
+# unique: the same content can be imported by several data sources, and the
+# same chunk can appear in more than one document.
+INDEXES = [
+    ("ix_documents_hash", "documents", ["hash"]),
+    ("ix_chunks_hash", "chunks", ["hash"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for index_name, table_name, columns in INDEXES:
+            drop_invalid_index(index_name)
+            op.create_index(
+                index_name,
+                table_name,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _ in reversed(INDEXES):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
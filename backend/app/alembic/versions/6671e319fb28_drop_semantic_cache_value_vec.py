@@ -0,0 +1,54 @@
+"""drop semantic_cache.value_vec
+
+Revision ID: 6671e319fb28
+Revises: bc2fe62eaae6
+Create Date: 2024-11-13 09:52:40.671329
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector, HALFVEC
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '6671e319fb28'
+down_revision = 'bc2fe62eaae6'
+branch_labels = None
+depends_on = None
+
+
+# Cache lookups only search on query_vec, value_vec was written (costing an
+# extra embedding call per entry) and indexed but never read.
+def upgrade():
+    op.drop_index(
+        "ix_semantic_cache_value_vec_hnsw", table_name="semantic_cache", if_exists=True
+    )
+    op.drop_column("semantic_cache", "value_vec")
+
+
+def downgrade():
+    if settings.VECTOR_HALF_PRECISION:
+        vector_type, opclass = HALFVEC(settings.EMBEDDING_DIMS), "halfvec_cosine_ops"
+    else:
+        vector_type, opclass = Vector(settings.EMBEDDING_DIMS), "vector_cosine_ops"
+    op.add_column(
+        "semantic_cache",
+        sa.Column(
+            "value_vec",
+            vector_type,
+            nullable=True,
+            comment="hnsw(distance=cosine)",
+        ),
+    )
+    op.create_index(
+        "ix_semantic_cache_value_vec_hnsw",
+        "semantic_cache",
+        ["value_vec"],
+        unique=False,
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"value_vec": opclass},
+    )
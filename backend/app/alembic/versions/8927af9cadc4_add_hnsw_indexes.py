@@ -0,0 +1,125 @@
+"""add hnsw indexes
+
+Revision ID: 8927af9cadc4
+Revises: c7f016a904c1
+Create Date: 2024-11-05 10:12:31.482907
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+from app.alembic.utils import drop_invalid_index
+from app.core.config import settings
+from app.models.base import hnsw_index_params
+
+
+# revision identifiers, used by Alembic.
+revision = '8927af9cadc4'
+down_revision = 'c7f016a904c1'
+branch_labels = None
+depends_on = None
+
+
+# The vector columns were only tagged with `comment="hnsw(distance=cosine)"`,
+# which is a TiDB convention and creates nothing on PostgreSQL, so every
+# similarity query ended up as a sequential scan.
+HNSW_INDEXES = [
+    ("ix_chunks_embedding_hnsw", "chunks", "embedding"),
+    ("ix_entities_description_vec_hnsw", "entities", "description_vec"),
+    ("ix_entities_meta_vec_hnsw", "entities", "meta_vec"),
+    ("ix_relationships_description_vec_hnsw", "relationships", "description_vec"),
+    ("ix_semantic_cache_query_vec_hnsw", "semantic_cache", "query_vec"),
+    ("ix_semantic_cache_value_vec_hnsw", "semantic_cache", "value_vec"),
+]
+# HNSW builds are dramatically faster when the whole graph fits in
+# maintenance_work_mem, and pgvector >= 0.6 can use parallel workers.
+MAINTENANCE_WORK_MEM = "2GB"
+MAX_PARALLEL_MAINTENANCE_WORKERS = 7
+# With HNSW_PARALLEL_INDEX_BUILD every index is built by its own backend, so
+# the memory is split between them and each build runs single threaded.
+PARALLEL_BUILD_MAINTENANCE_WORK_MEM = "1GB"
+
+
+def estimated_rows(table_name: str) -> int:
+    # Planner statistics are good enough to pick the index parameters and,
+    # unlike count(*), don't scan the table. reltuples is -1 if the table
+    # has never been analyzed.
+    reltuples = op.get_bind().scalar(
+        sa.text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table_name},
+    )
+    return max(int(reltuples or 0), 0)
+
+
+def create_index_sql(index_name: str, table_name: str, column_name: str) -> str:
+    params = hnsw_index_params(settings.EMBEDDING_DIMS, estimated_rows(table_name))
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table_name} "
+        f"USING hnsw ({column_name} vector_cosine_ops) "
+        f"WITH (m = {params['m']}, ef_construction = {params['ef_construction']})"
+    )
+
+
+def build_indexes_in_parallel(statements: list[str]):
+    # Every build gets its own connection, the migration's connection can't
+    # run more than one statement at a time.
+    engine = sa.create_engine(
+        op.get_bind().engine.url,
+        poolclass=sa.pool.NullPool,
+        isolation_level="AUTOCOMMIT",
+    )
+
+    def build(statement: str):
+        with engine.connect() as conn:
+            conn.execute(
+                sa.text(f"SET maintenance_work_mem = '{PARALLEL_BUILD_MAINTENANCE_WORK_MEM}'")
+            )
+            conn.execute(sa.text("SET max_parallel_maintenance_workers = 0"))
+            conn.execute(sa.text(statement))
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(statements)) as executor:
+            # list() re-raises the first failed build.
+            list(executor.map(build, statements))
+    finally:
+        engine.dispose()
+
+
+def upgrade():
+    statements = [
+        create_index_sql(index_name, table_name, column_name)
+        for index_name, table_name, column_name in HNSW_INDEXES
+    ]
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so the
+    # session settings are applied with SET (SET LOCAL is a no-op outside a
+    # transaction) and reset once the indexes are built.
+    with op.get_context().autocommit_block():
+        for index_name, _, _ in HNSW_INDEXES:
+            drop_invalid_index(index_name)
+        if settings.HNSW_PARALLEL_INDEX_BUILD:
+            build_indexes_in_parallel(statements)
+            return
+
+        op.execute(f"SET maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'")
+        op.execute(
+            f"SET max_parallel_maintenance_workers = {MAX_PARALLEL_MAINTENANCE_WORKERS}"
+        )
+        for statement in statements:
+            op.execute(statement)
+        op.execute("RESET max_parallel_maintenance_workers")
+        op.execute("RESET maintenance_work_mem")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _ in reversed(HNSW_INDEXES):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
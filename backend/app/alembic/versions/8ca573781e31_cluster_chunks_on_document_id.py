@@ -0,0 +1,33 @@
+"""cluster chunks on document_id
+
+Revision ID: 8ca573781e31
+Revises: 969c4cc59d21
+Create Date: 2024-11-15 15:48:02.519734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = '8ca573781e31'
+down_revision = '969c4cc59d21'
+branch_labels = None
+depends_on = None
+
+
+# Chunks are written in insertion order, so the chunks of one document end up
+# spread over many pages. This only marks ix_chunks_document_id as the
+# clustering index; the actual reordering takes an ACCESS EXCLUSIVE lock for
+# the whole rewrite and should be run out of band, e.g.
+#
+#     CLUSTER chunks;                      -- maintenance window
+#     pg_repack --table=chunks --order-by=document_id   -- online
+def upgrade():
+    op.execute("ALTER TABLE chunks CLUSTER ON ix_chunks_document_id")
+
+
+def downgrade():
+    op.execute("ALTER TABLE chunks SET WITHOUT CLUSTER")
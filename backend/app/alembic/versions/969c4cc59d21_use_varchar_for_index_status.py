@@ -0,0 +1,62 @@
+"""use varchar for index_status
+
+Revision ID: 969c4cc59d21
+Revises: 9b33781f6ed8
+Create Date: 2024-11-15 10:33:21.648095
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '969c4cc59d21'
+down_revision = '9b33781f6ed8'
+branch_labels = None
+depends_on = None
+
+
+# Native enum types need a non-transactional ALTER TYPE ... ADD VALUE for every
+# new status, a CHECK constraint on a VARCHAR can simply be replaced.
+INDEX_STATUSES = ("NOT_STARTED", "PENDING", "RUNNING", "COMPLETED", "FAILED")
+COLUMNS = [
+    ("documents", "docindextaskstatus"),
+    ("chunks", "kgindexstatus"),
+]
+
+
+def upgrade():
+    statuses = ", ".join(f"'{s}'" for s in INDEX_STATUSES)
+    for table_name, enum_name in COLUMNS:
+        op.alter_column(
+            table_name,
+            "index_status",
+            existing_type=postgresql.ENUM(*INDEX_STATUSES, name=enum_name),
+            type_=sa.String(length=16),
+            existing_nullable=False,
+            postgresql_using="index_status::text",
+        )
+        op.create_check_constraint(
+            f"ck_{table_name}_index_status",
+            table_name,
+            f"index_status IN ({statuses})",
+        )
+        op.execute(f"DROP TYPE IF EXISTS {enum_name}")
+
+
+def downgrade():
+    for table_name, enum_name in reversed(COLUMNS):
+        enum_type = postgresql.ENUM(*INDEX_STATUSES, name=enum_name)
+        enum_type.create(op.get_bind(), checkfirst=True)
+        op.drop_constraint(f"ck_{table_name}_index_status", table_name, type_="check")
+        op.alter_column(
+            table_name,
+            "index_status",
+            existing_type=sa.String(length=16),
+            type_=enum_type,
+            existing_nullable=False,
+            postgresql_using=f"index_status::{enum_name}",
+        )
@@ -0,0 +1,65 @@
+"""use bigint for high volume ids
+
+Revision ID: 9b33781f6ed8
+Revises: ccdc95edaf63
+Create Date: 2024-11-14 11:05:47.192630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = '9b33781f6ed8'
+down_revision = 'ccdc95edaf63'
+branch_labels = None
+depends_on = None
+
+
+# Knowledge graph, chat message and staff action log ids grow with every
+# ingested chunk / chat turn, so move them (and the columns referencing them)
+# to bigint before they get anywhere near 2^31. chunks.id is already a UUID.
+# NOTE: every ALTER below rewrites its table.
+SEQUENCES = [
+    "entities_id_seq",
+    "relationships_id_seq",
+    "chat_messages_id_seq",
+    "staff_action_logs_id_seq",
+]
+COLUMNS = [
+    ("entities", "id"),
+    ("relationships", "id"),
+    ("relationships", "source_entity_id"),
+    ("relationships", "target_entity_id"),
+    ("chat_messages", "id"),
+    ("feedbacks", "chat_message_id"),
+    ("recommend_questions", "chat_message_id"),
+    ("staff_action_logs", "id"),
+    ("staff_action_logs", "target_id"),
+]
+
+
+def upgrade():
+    for table_name, column_name in COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.Integer(),
+            type_=sa.BigInteger(),
+        )
+    for sequence_name in SEQUENCES:
+        op.execute(f"ALTER SEQUENCE {sequence_name} AS bigint")
+
+
+def downgrade():
+    for sequence_name in SEQUENCES:
+        op.execute(f"ALTER SEQUENCE {sequence_name} AS integer")
+    for table_name, column_name in reversed(COLUMNS):
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.BigInteger(),
+            type_=sa.Integer(),
+        )
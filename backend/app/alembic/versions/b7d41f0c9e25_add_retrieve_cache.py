@@ -0,0 +1,53 @@
+"""add retrieve_cache
+
+Revision ID: b7d41f0c9e25
+Revises: 3a7c2e91d4b6
+Create Date: 2024-11-20 14:36:08.517203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector, HALFVEC
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41f0c9e25'
+down_revision = '3a7c2e91d4b6'
+branch_labels = None
+depends_on = None
+
+
+# The retrieve cache kept its vectors in Redis, so every lookup downloaded
+# and decoded the whole namespace to find the nearest question. It is now
+# searched where the vectors are stored, and can be cleared when the
+# documents it was computed from change.
+def upgrade():
+    if settings.VECTOR_HALF_PRECISION:
+        vector_type = HALFVEC(settings.EMBEDDING_DIMS)
+    else:
+        vector_type = Vector(settings.EMBEDDING_DIMS)
+    op.create_table(
+        "retrieve_cache",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("namespace", sa.String(length=256), nullable=False),
+        sa.Column("query_vec", vector_type, nullable=False),
+        sa.Column("value", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_retrieve_cache_namespace_created_at",
+        "retrieve_cache",
+        ["namespace", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_retrieve_cache_namespace_created_at", table_name="retrieve_cache")
+    op.drop_table("retrieve_cache")
@@ -0,0 +1,74 @@
+"""use jsonb for hot json columns
+
+Revision ID: bc2fe62eaae6
+Revises: 5572c28f808a
+Create Date: 2024-11-12 15:36:09.724511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.alembic.utils import drop_invalid_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'bc2fe62eaae6'
+down_revision = '5572c28f808a'
+branch_labels = None
+depends_on = None
+
+
+# `json` is stored as text and parsed again on every read, `jsonb` is stored
+# parsed and can be indexed.
+COLUMNS = [
+    ("documents", "meta"),
+    ("chunks", "meta"),
+    ("chat_messages", "sources"),
+    ("chat_engines", "engine_options"),
+    ("chats", "engine_options"),
+]
+
+
+def upgrade():
+    for table_name, column_name in COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.JSON(),
+            type_=JSONB(),
+            postgresql_using=f"{column_name}::jsonb",
+        )
+    # The vector store filters chunks by metadata with `meta @> {...}`.
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_chunks_meta_gin")
+        op.create_index(
+            "ix_chunks_meta_gin",
+            "chunks",
+            ["meta"],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+            postgresql_using="gin",
+            postgresql_ops={"meta": "jsonb_path_ops"},
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_chunks_meta_gin",
+            table_name="chunks",
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
+    for table_name, column_name in reversed(COLUMNS):
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=JSONB(),
+            type_=sa.JSON(),
+            postgresql_using=f"{column_name}::json",
+        )
@@ -0,0 +1,45 @@
+"""add chat_messages (chat_id, ordinal) index
+
+Revision ID: ccdc95edaf63
+Revises: 6671e319fb28
+Create Date: 2024-11-13 14:27:18.305961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+from app.alembic.utils import drop_invalid_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'ccdc95edaf63'
+down_revision = '6671e319fb28'
+branch_labels = None
+depends_on = None
+
+
+# Messages are always loaded per chat ordered by ordinal (and the last one is
+# looked up to number a new message), which the index serves without a sort.
+def upgrade():
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_chat_messages_chat_id_ordinal")
+        op.create_index(
+            "ix_chat_messages_chat_id_ordinal",
+            "chat_messages",
+            ["chat_id", "ordinal"],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_chat_messages_chat_id_ordinal",
+            table_name="chat_messages",
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,71 @@
+"""use halfvec for vector columns
+
+Revision ID: ddaf5617e4a5
+Revises: 8927af9cadc4
+Create Date: 2024-11-07 16:41:05.213874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from pgvector.sqlalchemy import Vector
+
+from app.core.config import settings
+from app.models.base import hnsw_index_params
+
+
+# revision identifiers, used by Alembic.
+revision = 'ddaf5617e4a5'
+down_revision = '8927af9cadc4'
+branch_labels = None
+depends_on = None
+
+
+# (index_name, table_name, column_name), same as 8927af9cadc4
+HNSW_INDEXES = [
+    ("ix_chunks_embedding_hnsw", "chunks", "embedding"),
+    ("ix_entities_description_vec_hnsw", "entities", "description_vec"),
+    ("ix_entities_meta_vec_hnsw", "entities", "meta_vec"),
+    ("ix_relationships_description_vec_hnsw", "relationships", "description_vec"),
+    ("ix_semantic_cache_query_vec_hnsw", "semantic_cache", "query_vec"),
+    ("ix_semantic_cache_value_vec_hnsw", "semantic_cache", "value_vec"),
+]
+
+
+def _convert(vector_type: str, opclass: str):
+    dims = settings.EMBEDDING_DIMS
+    # The HNSW index is bound to the column's operator class, so it has to be
+    # dropped before the column type can change and rebuilt afterwards.
+    for index_name, table_name, column_name in HNSW_INDEXES:
+        rows = op.get_bind().scalar(
+            sa.text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table_name},
+        )
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+        op.execute(
+            f"ALTER TABLE {table_name} ALTER COLUMN {column_name} "
+            f"TYPE {vector_type}({dims}) USING {column_name}::{vector_type}({dims})"
+        )
+        op.create_index(
+            index_name,
+            table_name,
+            [column_name],
+            unique=False,
+            postgresql_using="hnsw",
+            postgresql_with=hnsw_index_params(dims, max(int(rows or 0), 0)),
+            postgresql_ops={column_name: opclass},
+        )
+
+
+def upgrade():
+    # Opt-in, existing deployments keep their FP32 columns unless
+    # VECTOR_HALF_PRECISION is enabled before running the migration.
+    if not settings.VECTOR_HALF_PRECISION:
+        return
+    _convert("halfvec", "halfvec_cosine_ops")
+
+
+def downgrade():
+    if not settings.VECTOR_HALF_PRECISION:
+        return
+    _convert("vector", "vector_cosine_ops")
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi_pagination import Params, Page
 
 from app.api.deps import SessionDep, CurrentSuperuserDep
-from app.rag.chat_config import ChatEngineConfig
+from app.rag.chat_config import ChatEngineConfig, invalidate_chat_engine_config_cache
 from app.repositories import chat_engine_repo
 from app.models import ChatEngine, ChatEngineUpdate
 
@@ -20,7 +20,9 @@ def list_chat_engines(
 def create_chat_engine(
     chat_engine: ChatEngine, session: SessionDep, user: CurrentSuperuserDep
 ) -> ChatEngine:
-    return chat_engine_repo.create(session, chat_engine)
+    chat_engine = chat_engine_repo.create(session, chat_engine)
+    invalidate_chat_engine_config_cache()
+    return chat_engine
 
 
 @router.get("/admin/chat-engines/{chat_engine_id}")
@@ -47,7 +49,9 @@ def update_chat_engine(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Chat engine not found"
         )
-    return chat_engine_repo.update(session, chat_engine, chat_engine_in)
+    chat_engine = chat_engine_repo.update(session, chat_engine, chat_engine_in)
+    invalidate_chat_engine_config_cache()
+    return chat_engine
 
 
 @router.delete("/admin/chat-engines/{chat_engine_id}")
@@ -64,7 +68,9 @@ def delete_chat_engine(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete the default chat engine",
         )
-    return chat_engine_repo.delete(session, chat_engine)
+    chat_engine = chat_engine_repo.delete(session, chat_engine)
+    invalidate_chat_engine_config_cache()
+    return chat_engine
 
 
 @router.get("/admin/chat-engines-default-config")
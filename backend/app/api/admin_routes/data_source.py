@@ -2,7 +2,7 @@ from pydantic import BaseModel, field_validator
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi_pagination import Params, Page
 
-from app.api.deps import SessionDep, CurrentSuperuserDep
+from app.api.deps import SessionDep, AsyncSessionDep, CurrentSuperuserDep
 from app.models import (
     DataSource,
     DataSourceType,
@@ -10,8 +10,8 @@ from app.models import (
 from app.tasks import (
     import_documents_from_datasource,
     purge_datasource_related_resources,
-    build_kg_index_from_chunk,
-    build_vector_index_from_document,
+    dispatch_vector_index_from_documents,
+    dispatch_kg_index_from_documents,
 )
 from app.repositories import data_source_repo
 from app.schemas import VectorIndexError, KGIndexError
@@ -58,21 +58,21 @@ def create_datasource(
 
 
 @router.get("/admin/datasources")
-def list_datasources(
-    session: SessionDep,
+async def list_datasources(
+    session: AsyncSessionDep,
     user: CurrentSuperuserDep,
     params: Params = Depends(),
 ) -> Page[DataSource]:
-    return data_source_repo.paginate(session, params)
+    return await data_source_repo.paginate_async(session, params)
 
 
 @router.get("/admin/datasources/{data_source_id}")
-def get_datasource(
-    session: SessionDep,
+async def get_datasource(
+    session: AsyncSessionDep,
     user: CurrentSuperuserDep,
     data_source_id: int,
 ) -> DataSource:
-    data_source = data_source_repo.get(session, data_source_id)
+    data_source = await data_source_repo.get_async(session, data_source_id)
     if data_source is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -165,12 +165,12 @@ def retry_failed_tasks(
     data_source = data_source_repo.get(session, data_source_id)
     if data_source is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    for docuemnt_id in data_source_repo.set_failed_vector_index_tasks_to_pending(
-        session, data_source
-    ):
-        build_vector_index_from_document.delay(data_source_id, docuemnt_id)
-    for chunk_id, document_id in data_source_repo.set_failed_kg_index_tasks_to_pending(
-        session, data_source
-    ):
-        build_kg_index_from_chunk.delay(data_source_id, document_id, chunk_id)
+    dispatch_vector_index_from_documents(
+        data_source_id,
+        data_source_repo.set_failed_vector_index_tasks_to_pending(session, data_source),
+    )
+    dispatch_kg_index_from_documents(
+        data_source_id,
+        data_source_repo.set_failed_kg_index_tasks_to_pending(session, data_source),
+    )
     return
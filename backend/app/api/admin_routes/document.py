@@ -4,8 +4,9 @@ from fastapi import APIRouter, Depends, Query
 from fastapi_pagination import Params, Page
 
 from app.api.deps import SessionDep, CurrentSuperuserDep
-from app.repositories import document_repo
+from app.repositories import document_repo, chunk_repo
 from app.models import Document
+from app.schemas import ChunkItem
 
 from app.repositories.document import DocumentFilters
 
@@ -23,3 +24,13 @@ def list_documents(
         filters=filters,
         params=params,
     )
+
+
+@router.get("/admin/documents/{document_id}/chunks")
+def list_document_chunks(
+    session: SessionDep,
+    user: CurrentSuperuserDep,
+    document_id: int,
+    params: Params = Depends(),
+) -> Page[ChunkItem]:
+    return chunk_repo.paginate_document_chunks(session, document_id, params)
@@ -10,6 +10,7 @@ from app.models import (
 from app.rag.knowledge_graph.graph_store import tidb_graph_editor as editor
 from app.rag.knowledge_graph.graph_store import TiDBGraphStore
 from app.rag.chat_config import get_default_embedding_model
+from app.rag.semantic_cache import retrieve_cache
 
 
 router = APIRouter()
@@ -36,7 +37,7 @@ class SynopsisEntityCreate(BaseModel):
 
 @router.post("/admin/graph/entities/synopsis", response_model=EntityPublic)
 def create_synopsis_entity(session: SessionDep, request: SynopsisEntityCreate):
-    return editor.create_synopsis_entity(
+    entity = editor.create_synopsis_entity(
         session,
         request.name,
         request.description,
@@ -44,6 +45,8 @@ def create_synopsis_entity(session: SessionDep, request: SynopsisEntityCreate):
         request.meta,
         request.entities,
     )
+    retrieve_cache.clear()
+    return entity
 
 
 @router.get("/admin/graph/entities/{entity_id}", response_model=EntityPublic)
@@ -72,6 +75,8 @@ def update_entity(session: SessionDep, entity_id: int, entity_update: EntityUpda
             detail="Entity not found",
         )
     entity = editor.update_entity(session, old_entity, entity_update.model_dump())
+    # The cached retrieve results may hold the entity as it was.
+    retrieve_cache.clear()
     return entity
 
 
@@ -124,6 +129,7 @@ def update_relationship(
     relationship = editor.update_relationship(
         session, old_relationship, relationship_update.model_dump()
     )
+    retrieve_cache.clear()
     return relationship
 
 
@@ -17,7 +17,12 @@ from app.rag.reranker_model_option import (
     admin_reranker_model_options,
     RerankerModelOption,
 )
-from app.rag.chat_config import get_llm, get_embedding_model, get_reranker_model
+from app.rag.chat_config import (
+    get_llm,
+    get_embedding_model,
+    get_reranker_model,
+    invalidate_chat_engine_config_cache,
+)
 from app.models import (
     ChatEngine,
     LLM,
@@ -130,6 +135,7 @@ def delete_llm(
     )
     session.delete(llm)
     session.commit()
+    invalidate_chat_engine_config_cache()
     return llm
 
 
@@ -341,3 +347,4 @@ def delete_reranker_model(
     )
     session.delete(reranker_model)
     session.commit()
+    invalidate_chat_engine_config_cache()
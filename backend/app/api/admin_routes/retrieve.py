@@ -1,6 +1,7 @@
 from typing import Optional, List
 
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from app.models import Document
 from app.api.deps import SessionDep, CurrentSuperuserDep
 from app.rag.retrieve import RetrieveService
@@ -17,8 +18,9 @@ async def retrieve_documents(
     chat_engine: str = "default",
     top_k: Optional[int] = 5,
 ) -> List[Document]:
-    retrieve_service = RetrieveService(session, chat_engine)
-    return retrieve_service.retrieve(question, top_k=top_k)
+    # Retrieval is blocking (DB + embedding/LLM calls), keep it off the event loop.
+    retrieve_service = await run_in_threadpool(RetrieveService, session, chat_engine)
+    return await run_in_threadpool(retrieve_service.retrieve, question, top_k=top_k)
 
 
 @router.get("/admin/embedding_retrieve")
@@ -29,5 +31,7 @@ async def embedding_retrieve(
     chat_engine: str = "default",
     top_k: Optional[int] = 5,
 ) -> List[NodeWithScore]:
-    retrieve_service = RetrieveService(session, chat_engine)
-    return retrieve_service._embedding_retrieve(question, top_k=top_k)
+    retrieve_service = await run_in_threadpool(RetrieveService, session, chat_engine)
+    return await run_in_threadpool(
+        retrieve_service._embedding_retrieve, question, top_k=top_k
+    )
@@ -3,6 +3,7 @@ import time
 import logging
 
 from fastapi import APIRouter, Body
+from fastapi.concurrency import run_in_threadpool
 from app.api.deps import SessionDep, CurrentSuperuserDep
 from app.rag.chat_config import ChatEngineConfig
 from app.rag.semantic_cache import SemanticCacheManager, SemanticItem
@@ -22,15 +23,20 @@ async def add_semantic_cache(
     chat_engine: str = "default",
     metadata: Optional[dict] = Body(None),
 ) -> Dict:
-    chat_engine_config = ChatEngineConfig.load_from_db(session, chat_engine)
-    _dspy_lm = chat_engine_config.get_dspy_lm(session)
+    # The semantic cache is built on the sync session and blocking LLM calls,
+    # run it in the threadpool instead of stalling the event loop.
+    chat_engine_config = await run_in_threadpool(
+        ChatEngineConfig.load_from_db, session, chat_engine
+    )
+    _dspy_lm = await run_in_threadpool(chat_engine_config.get_dspy_lm, session)
 
     scm = SemanticCacheManager(
         dspy_llm=_dspy_lm,
     )
 
     try:
-        scm.add_cache(
+        await run_in_threadpool(
+            scm.add_cache,
             session,
             item=SemanticItem(question=question, answer=answer),
             namespace=namespace,
@@ -56,8 +62,10 @@ async def search_semantic_cache(
     chat_engine: str = "default",
 ) -> Dict:
     start_time = time.time()
-    chat_engine_config = ChatEngineConfig.load_from_db(session, chat_engine)
-    _dspy_lm = chat_engine_config.get_dspy_lm(session)
+    chat_engine_config = await run_in_threadpool(
+        ChatEngineConfig.load_from_db, session, chat_engine
+    )
+    _dspy_lm = await run_in_threadpool(chat_engine_config.get_dspy_lm, session)
     logger.debug(
         f"[search_semantic_cache] Loading dspy_lm took {time.time() - start_time:.2f} seconds"
     )
@@ -67,7 +75,8 @@ async def search_semantic_cache(
     )
 
     start_time = time.time()
-    response = scm.search(
+    response = await run_in_threadpool(
+        scm.search,
         session=session,
         query=query,
         namespace=namespace,
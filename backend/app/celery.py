@@ -1,6 +1,8 @@
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_postrun
 from app.core.config import settings
+from app.core.db import Scoped_Session
 
 app = Celery(
     settings.PROJECT_NAME,
@@ -11,10 +13,42 @@ app = Celery(
 app.conf.update(
     task_acks_late=True,
     task_reject_on_worker_lost=True,
+    # Indexing tasks are long, don't let a worker reserve tasks it won't
+    # start for a while (and which are redelivered if it's lost).
+    worker_prefetch_multiplier=1,
+    # Tasks only carry ids (documents and chunks are read from the database),
+    # so JSON stays compact, and it round-trips the chunk UUIDs which msgpack
+    # can't encode.
+    task_serializer="json",
+    accept_content=["json"],
+    # Nothing reads the task results, don't write one to Redis per task.
+    task_ignore_result=True,
+    # With acks_late, Redis redelivers a task which isn't acked within the
+    # visibility timeout (1 hour by default), a batch of KG index tasks can
+    # take longer than that and would run twice.
+    broker_transport_options={
+        "visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT,
+    },
 )
 
 app.conf.broker_connection_retry_on_startup = True
 
 
+@task_postrun.connect
+def remove_task_session(**kwargs):
+    # Close the task's scoped session (if it used one) once the task is done.
+    Scoped_Session.remove()
+
+
+app.conf.beat_schedule = {
+    # Keep the next month's semantic cache partition ready and drop the
+    # partitions which are past the TTL.
+    "maintain-semantic-cache-partitions": {
+        "task": "app.tasks.semantic_cache.maintain_semantic_cache_partitions",
+        "schedule": crontab(minute=0, hour=0),
+    },
+}
+
+
 app.autodiscover_tasks(['app'])
 
@@ -1,4 +1,5 @@
 import enum
+from functools import cached_property
 from typing import Annotated, Any
 from dotenv import load_dotenv
 import os
@@ -60,7 +61,7 @@ class Settings(BaseSettings):
     # LANGFUSE_SECRET_KEY: str
 
     @computed_field  # type: ignore[misc]
-    @property
+    @cached_property
     def server_host(self) -> str:
         # Use HTTPS for anything other than local development
         if self.ENVIRONMENT == Environment.LOCAL:
@@ -95,13 +96,57 @@ class Settings(BaseSettings):
     PGDB_PASSWORD: str = "mypassword"
     PGDB_DATABASE: str = "mydb"
     PGDB_SSL: bool = False
+    PGDB_POOL_SIZE: int = 20
+    PGDB_MAX_OVERFLOW: int = 40
+    # Serverless clusters close idle connections after 5 minutes.
+    PGDB_POOL_RECYCLE: int = 300
+    # When connecting through pgbouncer (transaction pooling), leave the pooling
+    # to pgbouncer and open a fresh connection to it per checkout.
+    PGDB_USE_PGBOUNCER: bool = False
+    # Log every SQL statement and its parameters, for ad-hoc debugging only.
+    SQL_ECHO: bool = False
 
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
+    # How many documents / chunks are sent to the workers in one task message
+    # when (re)indexing in bulk. A batch is indexed serially by one worker
+    # process, keep it small so the LLM calls are still spread over the pool.
+    CELERY_TASK_BATCH_SIZE: int = 4
+    # How many documents of a data source import are held in memory and
+    # committed at once.
+    DATA_SOURCE_IMPORT_BATCH_SIZE: int = 100
+    # Seconds before an unacknowledged task is handed to another worker.
+    CELERY_VISIBILITY_TIMEOUT: int = 6 * 60 * 60
+
+    # Semantic cache in front of the retrieve APIs, stored in PostgreSQL.
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_TTL: int = 3600
+    # Minimum cosine similarity between two questions to reuse the results.
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 500
+    # Per process LRU of query embeddings, set the size to 0 to disable it.
+    EMBEDDING_CACHE_SIZE: int = 1024
+    EMBEDDING_CACHE_TTL: int = 3600
+    # Knowledge graphs extracted from the chunks, reused when a chunk with
+    # the same text is indexed again with the same LLM.
+    KG_EXTRACTION_CACHE_ENABLED: bool = True
+    # Stored in Redis, falls back to the celery broker when not set.
+    KG_EXTRACTION_CACHE_URL: str | None = None
+    KG_EXTRACTION_CACHE_TTL: int = 7 * 24 * 60 * 60
 
     # TODO: move below config to `option` table, it should be configurable by staff in console
     SUNDB_AI_CHAT_ENDPOINT: str = "http://localhost:3000/api/v1/chats"
     SUNDB_AI_API_KEY: SecretStr | None = None
+    # How many dataset items are evaluated at the same time, bounded by the
+    # rate limits of the chat endpoint and the evaluation LLM.
+    EVALUATION_CONCURRENCY: int = 8
+    # How many dataset items are started per second at most, 0 disables it.
+    EVALUATION_MAX_ITEMS_PER_SECOND: float = 8.0
+    # How many evaluation LLM calls are in flight to a provider at most.
+    EVALUATION_LLM_CONCURRENCY: int = 16
+    # Evaluator results are cached on disk between evaluation runs, set it to
+    # an empty value to disable the cache.
+    EVALUATION_CACHE_DIR: str | None = ".eval_cache"
 
     COMPLIED_INTENT_ANALYSIS_PROGRAM_PATH: str | None = None
     COMPLIED_PREREQUISITE_ANALYSIS_PROGRAM_PATH: str | None = None
@@ -114,14 +159,29 @@ class Settings(BaseSettings):
     #   maidalun1020/bce-embedding-base_v1: EMBEDDING_DIMS=768   EMBEDDING_MAX_TOKENS=512
     EMBEDDING_DIMS: int = 1536
     EMBEDDING_MAX_TOKENS: int = 7000
-
+    # How many texts are sent to the embedding API in one request when
+    # indexing, llama-index defaults to 10. 96 is the most Cohere accepts.
+    EMBEDDING_BATCH_SIZE: int = 96
+    # Rows per `COPY` statement when writing the chunks of a document.
+    CHUNK_COPY_BATCH_SIZE: int = 100
+    # Store embeddings as pgvector `halfvec` (FP16) instead of `vector` (FP32),
+    # which halves the size of the vector columns and their HNSW indexes.
+    # CAUTION: Run the alembic migrations again after changing this on an existing database.
+    VECTOR_HALF_PRECISION: bool = False
+    # Build the HNSW indexes in the migrations on separate connections at the
+    # same time instead of one after another. Only worth it with enough cores
+    # and memory on the database server.
+    HNSW_PARALLEL_INDEX_BUILD: bool = False
+
+    # The settings don't change after startup, so the derived values are
+    # computed once instead of on every access.
     @computed_field  # type: ignore[misc]
-    @property
+    @cached_property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         return f"postgresql+psycopg2://{self.PGDB_USER}:{self.PGDB_PASSWORD}@{self.PGDB_HOST}:{self.PGDB_PORT}/{self.PGDB_DATABASE}?sslmode=disable"
 
     @computed_field  # type: ignore[misc]
-    @property
+    @cached_property
     def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
         return f"postgresql+asyncpg://{self.PGDB_USER}:{self.PGDB_PASSWORD}@{self.PGDB_HOST}:{self.PGDB_PORT}/{self.PGDB_DATABASE}?ssl=disable"
 
@@ -1,37 +1,61 @@
 import ssl
+import threading
 import contextlib
+from functools import lru_cache
 from typing import AsyncGenerator, Generator
 
-from sqlmodel import create_engine, Session, text
+from sqlmodel import create_engine, Session
 from sqlalchemy import event
 from sqlalchemy.orm import scoped_session, sessionmaker, Session
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel.ext.asyncio.session import AsyncSession
 from pgvector.psycopg2 import register_vector  # Import pgvector registration
+from celery import current_task
 
 
 from app.core.config import settings
 
 
-# Serverless clusters have a limitation: if there are no active connections for 5 minutes,
-# they will shut down, which closes all connections, so we need to recycle the connections
+def get_pool_options() -> dict:
+    if settings.PGDB_USE_PGBOUNCER:
+        return {"poolclass": NullPool}
+    # Serverless clusters have a limitation: if there are no active connections for 5 minutes,
+    # they will shut down, which closes all connections, so we need to recycle the connections.
+    # LIFO keeps reusing a small set of hot connections and lets the rest go idle.
+    return {
+        "pool_size": settings.PGDB_POOL_SIZE,
+        "max_overflow": settings.PGDB_MAX_OVERFLOW,
+        "pool_recycle": settings.PGDB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "pool_use_lifo": True,
+    }
+
+
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
-    pool_size=20,
-    max_overflow=40,
-    pool_recycle=300,
-    pool_pre_ping=True,
+    echo=settings.SQL_ECHO,
+    **get_pool_options(),
 )
 
-# Register the vector type
-with Session(engine) as session:
-    with session.begin():
-        session.execute(text("create extension if not exists vector;"))
+
+def _session_scope():
+    # A celery worker process runs many tasks on the same thread, scoping by
+    # task keeps identity maps and transactions from leaking between them.
+    # Everywhere else (and in threads a task starts), scope by thread.
+    if current_task and current_task.request.id is not None:
+        return current_task.request.id
+    return threading.get_ident()
+
 
 # create a scoped session, ensure in multi-threading environment, each thread has its own session
-Scoped_Session = scoped_session(sessionmaker(bind=engine, class_=Session))
+Scoped_Session = scoped_session(
+    sessionmaker(bind=engine, class_=Session, expire_on_commit=False),
+    scopefunc=_session_scope,
+)
 
 
+@lru_cache(maxsize=1)
 def get_ssl_context():
     ssl_context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
     ssl_context.minimum_version = ssl.TLSVersion.TLSv1_2
@@ -39,17 +63,18 @@ def get_ssl_context():
     return ssl_context
 
 
-async_engine = create_async_engine(
-    str(settings.SQLALCHEMY_ASYNC_DATABASE_URI),
-    pool_recycle=300,
-    connect_args={
+def get_async_connect_args() -> dict:
+    connect_args = {}
+    if settings.PGDB_SSL:
         # seems config ssl in url is not working
         # we can only config ssl in connect_args
-        "ssl": get_ssl_context(),
-    }
-    if settings.PGDB_SSL
-    else {},
-)
+        connect_args["ssl"] = get_ssl_context()
+    if settings.PGDB_USE_PGBOUNCER:
+        # pgbouncer in transaction mode can hand each transaction a different
+        # server connection, so asyncpg's prepared statements can't be cached.
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+    return connect_args
 
 
 def prepare_db_connection(dbapi_connection, connection_record):
@@ -63,7 +88,20 @@ def prepare_db_connection(dbapi_connection, connection_record):
 
 
 event.listen(engine, "connect", prepare_db_connection)
-event.listen(async_engine.sync_engine, "connect", prepare_db_connection)
+
+
+# Only the API uses the async engine, so it's created on first use: the
+# celery workers never pay for its pool and SSL context.
+@lru_cache(maxsize=1)
+def get_async_engine() -> AsyncEngine:
+    async_engine = create_async_engine(
+        str(settings.SQLALCHEMY_ASYNC_DATABASE_URI),
+        connect_args=get_async_connect_args(),
+        echo=settings.SQL_ECHO,
+        **get_pool_options(),
+    )
+    event.listen(async_engine.sync_engine, "connect", prepare_db_connection)
+    return async_engine
 
 
 def get_db_session() -> Generator[Session, None, None]:
@@ -72,7 +110,7 @@ def get_db_session() -> Generator[Session, None, None]:
 
 
 async def get_db_async_session() -> AsyncGenerator[AsyncSession, None]:
-    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
         yield session
 
 
@@ -0,0 +1,54 @@
+import os
+import orjson
+import pickle
+import hashlib
+import logging
+import tempfile
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationCache:
+    """
+    An exact-match, on disk cache of the evaluator results of an evaluation
+    run, so re-running an evaluation against the same dataset only pays for
+    the evaluations whose inputs changed.
+
+    Keys are the SHA-256 of the JSON encoded inputs, every entry is a pickle
+    file under `path`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def make_key(namespace: str, **inputs: Any) -> str:
+        payload = orjson.dumps(inputs, option=orjson.OPT_SORT_KEYS, default=str)
+        return hashlib.sha256(namespace.encode() + b"\n" + payload).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read the evaluation cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, value: Any):
+        entry_path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            # Write to a temporary file and rename it, so a concurrent reader
+            # never sees a partial entry.
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path))
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f)
+            os.replace(tmp_path, entry_path)
+        except Exception as e:
+            logger.warning(f"Failed to write the evaluation cache entry {key}: {e}")
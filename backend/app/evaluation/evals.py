@@ -1,20 +1,24 @@
 import logging
 import asyncio
-import requests
+import httpx
 import typing
 import uuid
-import json
+import orjson
 from tqdm import tqdm
 from datetime import datetime
 from langfuse import Langfuse
 from langfuse.client import DatasetItemClient
 from langfuse.model import DatasetStatus
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import RetryCallState, retry, retry_if_exception, stop_after_attempt
 from llama_index.llms.gemini import Gemini
 from llama_index.llms.openai import OpenAI
+from deepeval.models import GPTModel
 
 
 from app.core.config import settings
+from app.evaluation.cache import EvaluationCache
+from app.evaluation.rate_limit import RateLimiter
+from app.rag.types import ChatEventType, ChatMessageSate
 from app.evaluation.evaluators import (
     LanguageEvaluator,
     ToxicityEvaluator,
@@ -36,6 +40,38 @@ DEFAULT_METRICS = [
         # "contextrelevance"
         ]
 DEFAULT_TIDB_AI_CHAT_ENGINE = "default"
+# Dataset items name the user input differently, the first key found is used.
+USER_INPUT_KEYS = ("user_input", "userInput", "input")
+OPTIONAL_SAMPLE_KEYS = ("retrieval_context", "graph_context", "refined_question")
+# The chat stream can pause for a while, e.g. while the knowledge graph is
+# searched.
+TIDB_AI_CHAT_TIMEOUT = 300
+TEXT_PART = str(ChatEventType.TEXT_PART.value)
+MESSAGE_ANNOTATIONS_PART = str(ChatEventType.MESSAGE_ANNOTATIONS_PART.value)
+ERROR_PART = str(ChatEventType.ERROR_PART.value)
+
+
+def is_retryable_chat_error(e: BaseException) -> bool:
+    # Connection errors, rate limits and server errors are worth retrying,
+    # a rejected request or a failed chat (ValueError) fails the same way again.
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429 or e.response.is_server_error
+    return isinstance(e, httpx.TransportError)
+
+
+def wait_retry_after(retry_state: RetryCallState) -> float:
+    # Wait as long as a rate limited (429) response asks to, 5 seconds
+    # otherwise.
+    exc = retry_state.outcome.exception()
+    if (
+        isinstance(exc, httpx.HTTPStatusError)
+        and exc.response.status_code == 429
+    ):
+        try:
+            return float(exc.response.headers.get("Retry-After", 5))
+        except ValueError:
+            pass
+    return 5
 
 
 class Evaluation:
@@ -46,6 +82,12 @@ class Evaluation:
         dataset_name: The name of the dataset in langfuse to evaluate.
         run_name: The name of the run to create. If not provided, a random name will be generated.
         llm_provider: The LLM provider to use. Can be "openai" or "google".
+        concurrency: How many dataset items are evaluated at the same time.
+        max_items_per_second: How many dataset items are started per second at
+            most, to stay within the rate limits. 0 disables the limit.
+        cache_dir: Where the evaluator results are cached between runs, None
+            disables the cache. The answers are always generated again, every
+            run scores its own traces.
 
     Examples:
 
@@ -61,11 +103,33 @@ class Evaluation:
         run_name: typing.Optional[str] = None,
         llm_provider: typing.Literal["openai", "gemini"] = "openai",
         tidb_ai_chat_engine: typing.Optional[str] = DEFAULT_TIDB_AI_CHAT_ENGINE,
+        concurrency: int = settings.EVALUATION_CONCURRENCY,
+        max_items_per_second: float = settings.EVALUATION_MAX_ITEMS_PER_SECOND,
+        cache_dir: typing.Optional[str] = settings.EVALUATION_CACHE_DIR,
     ) -> None:
         self.langfuse = Langfuse()
         self.dataset_name = dataset_name
         self.dataset = self.langfuse.get_dataset(dataset_name)
+        # The dataset doesn't change during the evaluation, the active items
+        # are selected and parsed once instead of on every run.
+        self._samples = [
+            (item, self.parse_sample(item))
+            for item in self.dataset.items
+            if item.status == DatasetStatus.ACTIVE
+        ]
         self.tidb_ai_chat_engine = tidb_ai_chat_engine
+        self.concurrency = concurrency
+        self.max_items_per_second = max_items_per_second
+        # Constant across the run, read once instead of on every chat request.
+        self._chat_endpoint = settings.SUNDB_AI_CHAT_ENDPOINT
+        self._chat_request = {
+            "index": "default",
+            # "chat_engine": self.tidb_ai_chat_engine,
+            "engine_name": self.tidb_ai_chat_engine,  # Updated field #todo:modified by david
+            "stream": True,
+        }
+        self._cache = EvaluationCache(cache_dir) if cache_dir else None
+        self._http: typing.Optional[httpx.AsyncClient] = None
 
         if run_name is None:
             random_str = uuid.uuid4().hex[:6]
@@ -81,66 +145,210 @@ class Evaluation:
         else:
             raise ValueError(f"Invalid LLM provider: {llm_provider}")
 
+        # One deepeval model (and OpenAI client) shared by every metric.
+        self._deepeval_model = GPTModel(model="gpt-4o-mini")
         self._metrics = {
             # "language": LanguageEvaluator(llm=self._llama_llm),
             # "toxicity": ToxicityEvaluator(llm=self._llama_llm),
-            "e2e_rag": E2ERagEvaluator(model="gpt-4o-mini"),
-            # "correctness": CorrectnessEvaluator(model="gpt-4o-mini"),
-            # "contextcorrectness": ContextCorrectnessEvaluator(model="gpt-4o-mini"),
+            "e2e_rag": E2ERagEvaluator(model=self._deepeval_model, cache=self._cache),
+            # "correctness": CorrectnessEvaluator(model=self._deepeval_model, cache=self._cache),
+            # "contextcorrectness": ContextCorrectnessEvaluator(model=self._deepeval_model, cache=self._cache),
             # "contextrelevance": ContextRelevanceEvaluator(llm=self._llama_llm)
         }
+        # What identifies an evaluator in the cache keys is fixed, it is looked
+        # up once instead of for every sample.
+        self._metric_cache_params = {
+            metric: {
+                "metric": metric,
+                "evaluator": type(evaluator).__name__,
+                "model": getattr(evaluator, "_model_name", None)
+                or getattr(getattr(evaluator, "_llm", None), "model", None),
+                "prompt_template": getattr(evaluator, "_prompt_template", None),
+            }
+            for metric, evaluator in self._metrics.items()
+        }
 
     def run(self, metrics: list = DEFAULT_METRICS) -> None:
-        for item in tqdm(self.dataset.items):
-            if item.status != DatasetStatus.ACTIVE:
-                continue
-
-            sample_data = self.parse_sample(item)
-            output, trace_id = self._generate_answer_by_tidb_ai(sample_data["messages"],retrieval_context=sample_data.get("retrieval_context", []))
-            trace_data = fetch_rag_data(self.langfuse, trace_id)
-            contexts = trace_data.get("retrieval_context", [])
-            question = json.dumps(sample_data["messages"])
-            item.link(
+        asyncio.run(self.run_async(metrics))
+
+    async def run_async(self, metrics: list = DEFAULT_METRICS) -> None:
+        # Every item is bound by the latency of the chat endpoint and the
+        # evaluation LLM, so the items are evaluated concurrently, at most
+        # `concurrency` at a time.
+        # Evaluators which can score many test cases in one run (the deepeval
+        # based ones) are run once over the whole dataset, after every answer
+        # is generated. The others are run per item.
+        batch_metrics = [
+            metric for metric in metrics if hasattr(self._metrics[metric], "batch_evaluate")
+        ]
+        item_metrics = [metric for metric in metrics if metric not in batch_metrics]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        rate_limiter = RateLimiter(self.max_items_per_second)
+        # One client for the whole run, so the connections to SunDB AI are
+        # kept alive and reused by the items instead of one per request.
+        async with self._create_http_client() as self._http:
+            with tqdm(total=len(self._samples)) as progress:
+                results = await asyncio.gather(
+                    *[
+                        self._process_item(
+                            item,
+                            sample_data,
+                            item_metrics,
+                            semaphore,
+                            rate_limiter,
+                            progress,
+                        )
+                        for item, sample_data in self._samples
+                    ],
+                    return_exceptions=True,
+                )
+        self._http = None
+
+        samples = []
+        for (item, _), result in zip(self._samples, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to evaluate dataset item {item.id}: {result!r}")
+            else:
+                samples.append(result)
+        for metric in batch_metrics:
+            await self._batch_evaluate_metric(metric, samples)
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        headers = {"Content-Type": "application/json"}
+        if settings.SUNDB_AI_API_KEY is not None:
+            headers["Authorization"] = (
+                f"Bearer {settings.SUNDB_AI_API_KEY.get_secret_value()}"
+            )
+        return httpx.AsyncClient(
+            base_url=self._chat_endpoint,
+            headers=headers,
+            timeout=TIDB_AI_CHAT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+
+    async def _process_item(
+        self,
+        item: DatasetItemClient,
+        sample_data: dict,
+        metrics: list,
+        semaphore: asyncio.Semaphore,
+        rate_limiter: RateLimiter,
+        progress: tqdm,
+    ) -> typing.Tuple[str, dict]:
+        async with semaphore:
+            await rate_limiter.wait()
+            try:
+                return await self._evaluate_item(item, sample_data, metrics)
+            finally:
+                progress.update(1)
+
+    async def _evaluate_item(
+        self, item: DatasetItemClient, sample_data: dict, metrics: list
+    ) -> typing.Tuple[str, dict]:
+        # The Langfuse and deepeval clients are blocking, they are run in
+        # threads to leave the event loop free for the other items.
+        output, trace_id = await self._generate_answer_by_tidb_ai(
+            sample_data["messages"],
+            retrieval_context=sample_data.get("retrieval_context", []),
+        )
+        # The item is linked only once the answer is complete: a retried
+        # answer has a new trace, the one that gets scored. The trace can be
+        # fetched while the link request is in flight.
+        trace_data, _ = await asyncio.gather(
+            asyncio.to_thread(fetch_rag_data, self.langfuse, trace_id),
+            asyncio.to_thread(
+                item.link,
                 trace_or_observation=None,
                 trace_id=trace_id,
                 run_name=self.run_name,
+            ),
+        )
+        contexts = trace_data.get("retrieval_context", [])
+        question = orjson.dumps(sample_data["messages"]).decode()
+
+        inputs = {
+            "query": question,
+            "response": output,
+            "contexts": contexts,
+            "reference": sample_data.get("expected_output", None),
+        }
+        # The metrics are independent LLM calls, run them all at once.
+        results = await asyncio.gather(
+            *[
+                self._evaluate_metric(metric, self._metrics[metric], **inputs)
+                for metric in metrics
+            ]
+        )
+        for metric, result in zip(metrics, results):
+            self._record_scores(trace_id, metric, result)
+        return trace_id, inputs
+
+    def _metric_cache_key(self, metric: str, inputs: dict) -> str:
+        return self._cache.make_key(
+            "metric", **self._metric_cache_params[metric], **inputs
+        )
+
+    async def _evaluate_metric(self, metric: str, evaluator, **kwargs):
+        cache_key = None
+        if self._cache is not None:
+            cache_key = self._metric_cache_key(metric, kwargs)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if hasattr(evaluator, "aevaluate"):
+            result = await evaluator.aevaluate(**kwargs)
+        else:
+            # An evaluator without a coroutine is blocking.
+            result = await asyncio.to_thread(evaluator.evaluate, **kwargs)
+        # An empty result means the evaluation failed, it's worth retrying.
+        if cache_key is not None and result:
+            self._cache.set(cache_key, result)
+        return result
+
+    async def _batch_evaluate_metric(
+        self, metric: str, samples: typing.List[typing.Tuple[str, dict]]
+    ) -> None:
+        # The batch evaluators cache every metric of a sample on their own.
+        evaluator = self._metrics[metric]
+        inputs = [inputs for _, inputs in samples]
+        if hasattr(evaluator, "abatch_evaluate"):
+            results = await evaluator.abatch_evaluate(
+                inputs, concurrency=self.concurrency
             )
+        else:
+            # An evaluator without a coroutine is blocking.
+            results = await asyncio.to_thread(evaluator.batch_evaluate, inputs)
 
-            for metric in metrics:
-                evaluator = self._metrics[metric]
-                result = evaluator.evaluate(
-                    query=question,
-                    response=output,
-                    contexts=contexts,
-                    
-                    reference=sample_data.get("expected_output", None),
-                )
-                if isinstance(result, dict):
-                    print(f"\n\nMetrics for {metric}:\n\n")
-                    for eval_name, eval_res in result.items():
-                        self.langfuse.score(
-                            trace_id=trace_id,
-                            name=eval_name,
-                            value=eval_res.score,
-                            comment=eval_res.feedback,
-                        )
-                        # Print the metric name and score
-                        print(f"\n\n{eval_name}: {eval_res.score}\n\n")
-                else:
-                    self.langfuse.score(
-                        trace_id=trace_id,
-                        name=metric,
-                        value=result.score,
-                        comment=result.feedback,
-                    )
-                    # Print the metric name and score
-                    print(f"\n\n{metric}: {result.score}\n\n")
+        for (trace_id, _), result in zip(samples, results):
+            self._record_scores(trace_id, metric, result)
+
+    def _record_scores(self, trace_id: str, metric: str, result) -> None:
+        if not isinstance(result, dict):
+            result = {metric: result}
+        for eval_name, eval_res in result.items():
+            self.langfuse.score(
+                trace_id=trace_id,
+                name=eval_name,
+                value=eval_res.score,
+                comment=eval_res.feedback,
+            )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "trace=%s metric=%s scores=%s",
+                trace_id,
+                metric,
+                {eval_name: eval_res.score for eval_name, eval_res in result.items()},
+            )
 
     def parse_sample(self, item: DatasetItemClient):
         expected_output = item.expected_output.strip()
         messages = []
 
-        print(f"\n\nItem Input: {item.input}\n\n")  # Debugging statement
+        logger.debug("Item input: %s", item.input)
 
         if "history" in item.input:
             messages = [
@@ -153,89 +361,108 @@ class Evaluation:
                 for message in item.input["history"]
             ]
 
-        # if "userInput" in item.input:
-        #     messages.append({"role": "user", "content": item.input["userInput"]})
-        # elif "input" in item.input:
-        #     messages.append({"role": "user", "content": item.input["input"]})
-        if "user_input" in item.input:
-            messages.append({"role": "user", "content": item.input["user_input"]})
-        elif "userInput" in item.input:
-            messages.append({"role": "user", "content": item.input["userInput"]})
-        elif "input" in item.input:
-            messages.append({"role": "user", "content": item.input["input"]})
+        for key in USER_INPUT_KEYS:
+            if key in item.input:
+                messages.append({"role": "user", "content": item.input[key]})
+                break
         else:
-            logger.warning(f"No valid user input found in item: {item.input}")
+            logger.warning("No valid user input found in item: %s", item.input)
 
         # Log a warning if messages are empty
         if not messages:
-            logger.warning(f"Messages are empty for item with input: {item.input}")
-
+            logger.warning("Messages are empty for item with input: %s", item.input)
 
-        print(f"\n\nParsed Messages: {messages}\n\n")  # Debugging statement
+        logger.debug("Parsed messages: %s", messages)
 
         sample_data = {
             "messages": messages,
             "expected_output": expected_output,
         }
 
-        if "retrieval_context" in item.input:
-            sample_data["retrieval_context"] = item.input["retrieval_context"]
-        if "graph_context" in item.input:
-            sample_data["graph_context"] = item.input["graph_context"]
-        if "refined_question" in item.input:
-            sample_data["refined_question"] = item.input["refined_question"]
+        for key in OPTIONAL_SAMPLE_KEYS:
+            if key in item.input:
+                sample_data[key] = item.input[key]
 
         return sample_data
 
-    @retry(stop=stop_after_attempt(2), wait=wait_fixed(5))
-    def _generate_answer_by_tidb_ai(self, messages: list, retrieval_context: list) -> typing.Tuple[str, str]:
-        # Include the retrieval context in the system prompt
-        if retrieval_context:
-            context_text = "\n".join(retrieval_context)
-            messages.insert(0, {
-                "role": "system",
-                "content": f"Please use the following context to answer the question:\n{context_text}"
-            })
+    @retry(
+        stop=stop_after_attempt(2),
+        wait=wait_retry_after,
+        retry=retry_if_exception(is_retryable_chat_error),
+        reraise=True,
+    )
+    async def _generate_answer_by_tidb_ai(
+        self,
+        messages: list,
+        retrieval_context: list,
+    ) -> typing.Tuple[str, str]:
+        # Include the retrieval context in the system prompt. The given
+        # messages are left untouched, so a retry sends the same request
+        # instead of adding the context and the instruction twice.
+        payload_messages = (
+            [
+                {
+                    "role": "system",
+                    "content": "Please use the following context to answer the question:\n"
+                    + "\n".join(retrieval_context),
+                }
+            ]
+            if retrieval_context
+            else []
+        ) + list(messages)
 
         # Modify the last user message to include the instruction
-        if messages and messages[-1]['role'] == 'user':
-            messages[-1]['content'] += (
-                "\n"
-                
-                # "You only provides answers in the exact format requested."
-                # "\n\nPlease answer in the following format:\n"
-                # "- For single-choice questions, reply with only the letter corresponding to the correct option (e.g., 'A').\n"
-                # "- For multiple-choice questions, reply only with all correct option letters together without spaces or punctuation (e.g., 'BC').\n"
-                # "Do not include any additional text or explanations in your answer. Only provide the letters of the correct options."
-                # "Do not include any additional text beyond what is specified in the response format."
-                # "Do not include any additional text outside of this format."
-            )
-
-        try:
-            response = requests.post(
-                settings.SUNDB_AI_CHAT_ENDPOINT,
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {settings.SUNDB_AI_API_KEY}",
-                },
-                json={
-                    "messages": messages,
-                    "index": "default",
-                    # "chat_engine": self.tidb_ai_chat_engine,
-                    "engine_name": self.tidb_ai_chat_engine,  # Updated field #todo:modified by david
-                    "stream": False,
-                },
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            print(f"HTTP error occurred: {err}")
-            print(f"Status Code: {response.status_code}")
-            print(f"Response Body: {response.text}")
-            raise
-        data = response.json()
-        trace_url = data["trace"]["langfuse_url"]
-        answer = data["content"].strip() 
-        return answer, parse_langfuse_trace_id_from_url(trace_url)
+        if payload_messages and payload_messages[-1]['role'] == 'user':
+            payload_messages[-1] = {
+                **payload_messages[-1],
+                "content": payload_messages[-1]["content"] + (
+                    "\n"
+
+                    # "You only provides answers in the exact format requested."
+                    # "\n\nPlease answer in the following format:\n"
+                    # "- For single-choice questions, reply with only the letter corresponding to the correct option (e.g., 'A').\n"
+                    # "- For multiple-choice questions, reply only with all correct option letters together without spaces or punctuation (e.g., 'BC').\n"
+                    # "Do not include any additional text or explanations in your answer. Only provide the letters of the correct options."
+                    # "Do not include any additional text beyond what is specified in the response format."
+                    # "Do not include any additional text outside of this format."
+                ),
+            }
+
+        content, trace_url = [], None
+        async with self._http.stream(
+            "POST", "", json={**self._chat_request, "messages": payload_messages}
+        ) as response:
+            if response.is_error:
+                await response.aread()
+                logger.error(
+                    "SunDB AI chat failed with status %s: %s",
+                    response.status_code,
+                    response.text,
+                )
+                response.raise_for_status()
+
+            # Every line of the stream is `<event type>:<json payload>`, see
+            # app.rag.chat_stream_protocol.
+            async for line in response.aiter_lines():
+                event_type, _, body = line.partition(":")
+                if not body:
+                    continue
+                if event_type == TEXT_PART:
+                    content.append(orjson.loads(body))
+                elif event_type == MESSAGE_ANNOTATIONS_PART:
+                    for annotation in orjson.loads(body):
+                        if (
+                            trace_url is None
+                            and annotation.get("state") == ChatMessageSate.TRACE.name
+                            and isinstance(annotation.get("context"), dict)
+                            and annotation["context"].get("langfuse_url")
+                        ):
+                            trace_url = annotation["context"]["langfuse_url"]
+                elif event_type == ERROR_PART:
+                    raise ValueError(f"SunDB AI chat failed: {orjson.loads(body)}")
+
+        answer = "".join(content).strip()
+        return answer, parse_langfuse_trace_id_from_url(trace_url or "")
 
 
 def parse_langfuse_trace_id_from_url(trace_url: str) -> str:
@@ -243,11 +470,15 @@ def parse_langfuse_trace_id_from_url(trace_url: str) -> str:
     return trace_url.split("/")[-1]
 
 
-def fetch_rag_data(langfuse_client: Langfuse, tracing_id: str):
-    graph_context_key = "retrieve_from_graph"
-    reranking_key = "reranking"
-    refined_question_key = "condense_question"
+RERANKING_KEY = "reranking"
+GRAPH_CONTEXT_KEY = "retrieve_from_graph"
+REFINED_QUESTION_KEY = "condense_question"
+RAG_OBSERVATIONS = {RERANKING_KEY, GRAPH_CONTEXT_KEY, REFINED_QUESTION_KEY}
 
+
+def fetch_rag_data(langfuse_client: Langfuse, tracing_id: str):
+    # The traces of the dataset items are fetched concurrently by
+    # Evaluation._evaluate_item, the Langfuse client has no async API.
     tracing_data = langfuse_client.fetch_trace(tracing_id)
 
     data = {
@@ -266,24 +497,19 @@ def fetch_rag_data(langfuse_client: Langfuse, tracing_id: str):
     }
 
     for ob in tracing_data.data.observations:
-        if reranking_key == ob.name and ob.output:
-            retrieval_context = []
-            for node in ob.output.get("nodes", []):
-                retrieval_context.append(node["node"]["text"])
-            data["retrieval_context"] = retrieval_context
-        if graph_context_key == ob.name:
+        if ob.name not in RAG_OBSERVATIONS:
+            continue
+        if ob.name == RERANKING_KEY:
+            data["retrieval_context"] = [
+                node["node"]["text"] for node in (ob.output or {}).get("nodes") or ()
+            ]
+        elif ob.name == GRAPH_CONTEXT_KEY:
             graph_context = {query: sg for query, sg in ob.output["graph"].items()}
             for _, sg in graph_context.items():
                 for entity in sg["entities"]:
                     entity.pop("meta", None)
             data["graph_context"] = graph_context
-        if reranking_key == ob.name:
-            retrieval_context = []
-            for node in ob.output["nodes"]:
-                retrieval_context.append(node["node"]["text"])
-            data["retrieval_context"] = retrieval_context
-        if refined_question_key == ob.name:
-            refined_question = ob.output
-            data["refined_question"] = refined_question
+        else:
+            data["refined_question"] = ob.output
 
     return data
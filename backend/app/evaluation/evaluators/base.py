@@ -0,0 +1,245 @@
+import copy
+import weakref
+import asyncio
+import logging
+from typing import (
+    Any,
+    AsyncIterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+import httpx
+import openai
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from deepeval.metrics import BaseMetric
+from deepeval.models import DeepEvalBaseLLM, GPTModel
+from deepeval.test_case import LLMTestCase
+from llama_index.core.evaluation.base import EvaluationResult
+
+from app.core.config import settings
+from app.evaluation.cache import EvaluationCache
+
+logger = logging.getLogger(__name__)
+
+
+
+def is_transient_error(e: BaseException) -> bool:
+    # Rate limits, connection errors and malformed LLM outputs are usually
+    # transient, other errors (e.g. a bad metric configuration) are not.
+    if isinstance(e, ValueError):
+        return "invalid JSON" in str(e)
+    return isinstance(
+        e, (openai.RateLimitError, openai.APIConnectionError, httpx.HTTPError)
+    )
+
+
+# Exponential backoff with full jitter, so the calls rate limited together
+# don't retry together.
+retry_transient_errors = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    retry=retry_if_exception(is_transient_error),
+    reraise=True,
+)
+
+_llm_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_llm_semaphore(provider: str) -> asyncio.Semaphore:
+    # Caps the LLM calls in flight to a provider across every evaluator, a
+    # semaphore is bound to the event loop it is used in.
+    semaphores = _llm_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if provider not in semaphores:
+        semaphores[provider] = asyncio.Semaphore(settings.EVALUATION_LLM_CONCURRENCY)
+    return semaphores[provider]
+
+
+def get_deepeval_model(model: Union[str, DeepEvalBaseLLM]) -> DeepEvalBaseLLM:
+    # A metric given a model name creates its own client, share one instead.
+    if isinstance(model, str):
+        return GPTModel(model=model)
+    return model
+
+
+class DeepEvalEvaluator:
+    """
+    Base class of the evaluators backed by deepeval metrics, subclasses define
+    the metrics and how a dataset item is turned into a test case.
+    """
+
+    # Blocking metrics, their `a_measure` doesn't yield to the event loop so
+    # they are measured in a thread instead.
+    _blocking_metric_types: Tuple[Type[BaseMetric], ...] = ()
+    # Every metric result is cached on its own, so a run measuring a
+    # different set of metrics still hits the cache for the shared ones.
+    _cache: Optional[EvaluationCache] = None
+
+    def _deepeval_metrics(self) -> List[BaseMetric]:
+        raise NotImplementedError
+
+    def _test_case(
+        self,
+        query: Optional[str],
+        response: Optional[str],
+        contexts: Optional[Sequence[str]],
+        reference: Optional[str],
+    ) -> LLMTestCase:
+        raise NotImplementedError
+
+    def evaluate(
+        self,
+        query: Optional[str] = None,
+        response: Optional[str] = None,
+        contexts: Optional[Sequence[str]] = None,
+        reference: Optional[str] = None,
+    ) -> Mapping[str, EvaluationResult]:
+        return asyncio.run(
+            self.aevaluate(
+                query=query, response=response, contexts=contexts, reference=reference
+            )
+        )
+
+    def batch_evaluate(
+        self, inputs: List[Mapping[str, Any]], concurrency: Optional[int] = None
+    ) -> List[Mapping[str, EvaluationResult]]:
+        return asyncio.run(self.abatch_evaluate(inputs, concurrency=concurrency))
+
+    async def aevaluate(
+        self,
+        query: Optional[str] = None,
+        response: Optional[str] = None,
+        contexts: Optional[Sequence[str]] = None,
+        reference: Optional[str] = None,
+    ) -> Mapping[str, EvaluationResult]:
+        # A single item is a batch of one, there is only one evaluation path.
+        return (
+            await self.abatch_evaluate(
+                [
+                    {
+                        "query": query,
+                        "response": response,
+                        "contexts": contexts,
+                        "reference": reference,
+                    }
+                ]
+            )
+        )[0]
+
+    async def abatch_evaluate(
+        self, inputs: List[Mapping[str, Any]], concurrency: Optional[int] = None
+    ) -> List[Mapping[str, EvaluationResult]]:
+        # The metrics are measured with deepeval's async API, every LLM call
+        # of every test case is in flight at the same time, at most
+        # `concurrency` test cases at a time if given.
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+        async def measure(i: Mapping[str, Any]) -> Mapping[str, EvaluationResult]:
+            if semaphore is None:
+                return await self._ameasure(i)
+            async with semaphore:
+                return await self._ameasure(i)
+
+        return await asyncio.gather(*[measure(i) for i in inputs])
+
+    async def aevaluate_stream(
+        self,
+        query: Optional[str] = None,
+        response: Optional[str] = None,
+        contexts: Optional[Sequence[str]] = None,
+        reference: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, EvaluationResult]]:
+        # Yields the result of every metric as soon as it is measured, for the
+        # callers persisting them one by one.
+        async for name, result in self._ameasure_stream(
+            {
+                "query": query,
+                "response": response,
+                "contexts": contexts,
+                "reference": reference,
+            }
+        ):
+            yield name, result
+
+    async def _ameasure(
+        self, inputs: Mapping[str, Any]
+    ) -> Mapping[str, EvaluationResult]:
+        return {name: result async for name, result in self._ameasure_stream(inputs)}
+
+    async def _ameasure_stream(
+        self, inputs: Mapping[str, Any]
+    ) -> AsyncIterator[Tuple[str, EvaluationResult]]:
+        test_case = self._test_case(**inputs)
+
+        async def measure(metric: BaseMetric):
+            try:
+                return metric, await self._ameasure_cached(metric, test_case, inputs)
+            except Exception as e:
+                return metric, e
+
+        tasks = [asyncio.create_task(measure(metric)) for metric in self._deepeval_metrics()]
+        try:
+            for next_measure in asyncio.as_completed(tasks):
+                metric, result = await next_measure
+                if isinstance(result, Exception):
+                    logger.warning(f"Failed to measure {metric.__name__}: {result!r}")
+                    continue
+                yield metric.__name__, result
+        finally:
+            # The caller may stop iterating before every metric is measured.
+            for task in tasks:
+                task.cancel()
+
+    async def _ameasure_cached(
+        self, metric: BaseMetric, test_case: LLMTestCase, inputs: Mapping[str, Any]
+    ) -> EvaluationResult:
+        cache_key = None
+        if self._cache is not None:
+            cache_key = self._cache.make_key(
+                "deepeval_metric",
+                metric=metric.__name__,
+                metric_type=type(metric).__name__,
+                threshold=getattr(metric, "threshold", None),
+                model=self._model_name,
+                prompt_template=getattr(self, "_prompt_template", None),
+                **inputs,
+            )
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # A metric keeps the score of its last measure, every test case is
+        # measured by its own copy to be measured concurrently.
+        metric = copy.copy(metric)
+        await self._ameasure_metric(metric, test_case)
+        result = EvaluationResult(
+            query=inputs.get("query"),
+            response=inputs.get("response"),
+            contexts=inputs.get("contexts"),
+            passing=metric.is_successful(),
+            score=metric.score or 0.0,
+            feedback=getattr(metric, "reason", None) or getattr(metric, "error", None),
+        )
+        if cache_key is not None:
+            self._cache.set(cache_key, result)
+        return result
+
+    @retry_transient_errors
+    async def _ameasure_metric(self, metric: BaseMetric, test_case: LLMTestCase):
+        # The semaphore is released between the attempts, a backing off call
+        # doesn't hold a slot.
+        async with get_llm_semaphore(type(self._model).__name__):
+            if isinstance(metric, self._blocking_metric_types):
+                await asyncio.to_thread(metric.measure, test_case)
+            else:
+                await metric.a_measure(test_case, _show_indicator=False)
@@ -1,33 +1,12 @@
 import re
 import time
-from typing import Optional, Sequence, Mapping
+from typing import Optional, Sequence, Mapping, Tuple
 from llama_index.core.prompts.base import Prompt
 
 from llama_index.core.evaluation.base import EvaluationResult
 
-class ContextRelevanceEvaluator:
-    def __init__(self, llm, threshold=0.7):
-        self._llm = llm
-        self._threshold = threshold
-
-    def evaluate(
-        self,
-        query: Optional[str],
-        response: Optional[str],
-        contexts: Optional[Sequence[str]],
-        reference: Optional[str],
-    ) -> Mapping[str, EvaluationResult]:
-        if query is None or response is None or contexts is None:
-            raise ValueError("query, response, and contexts must be provided")
-
-        options = self._extract_options_from_query(query)
-        selected_options = [options[letter] for letter in response if letter in options]
-
-        # Compute the expressions outside the f-string
-        context_text = "\n".join(contexts)
-        selected_answers_text = ', '.join(selected_options)
 
-        prompt_template = Prompt(template="""
+DEFAULT_EVAL_TEMPLATE = Prompt(template="""
         
         You are an expert evaluator specializing in assessing the relevance of selected answers to the provided context.
 
@@ -81,16 +60,109 @@ class ContextRelevanceEvaluator:
         **Your Evaluation:**
 
         """)
+OPTION_PATTERN = re.compile(r'([A-D])\.\s*(.+)')
+# Standalone answer letters, e.g. "B" or "BC" but not the "A" in "Answer".
+ANSWER_PATTERN = re.compile(r'\b([A-D]+)\b')
+
+
+class NothingToEvaluate(Exception):
+    pass
+
+
+class ContextRelevanceEvaluator:
+    def __init__(self, llm, threshold=0.7):
+        self._llm = llm
+        self._threshold = threshold
+
+    def evaluate(
+        self,
+        query: Optional[str],
+        response: Optional[str],
+        contexts: Optional[Sequence[str]],
+        reference: Optional[str],
+    ) -> Mapping[str, EvaluationResult]:
+        try:
+            prompt_template, prompt_args = self._build_prompt(query, response, contexts)
+        except NothingToEvaluate as e:
+            return self._skipped_evaluation(query, response, contexts, str(e))
+        eval_response = self._llm.predict(prompt_template, **prompt_args)
+        return self._parse_evaluation(query, response, contexts, eval_response)
+
+    async def aevaluate(
+        self,
+        query: Optional[str],
+        response: Optional[str],
+        contexts: Optional[Sequence[str]],
+        reference: Optional[str],
+    ) -> Mapping[str, EvaluationResult]:
+        try:
+            prompt_template, prompt_args = self._build_prompt(query, response, contexts)
+        except NothingToEvaluate as e:
+            return self._skipped_evaluation(query, response, contexts, str(e))
+        eval_response = await self._llm.apredict(prompt_template, **prompt_args)
+        return self._parse_evaluation(query, response, contexts, eval_response)
+
+    def _build_prompt(
+        self,
+        query: Optional[str],
+        response: Optional[str],
+        contexts: Optional[Sequence[str]],
+    ) -> Tuple[Prompt, dict]:
+        if query is None or response is None or contexts is None:
+            raise ValueError("query, response, and contexts must be provided")
+        # The relevance is judged solely on the context, without it the LLM
+        # can only make a score up.
+        if not contexts:
+            raise NothingToEvaluate("No context was retrieved; skipped.")
+
+        options = self._extract_options_from_query(query)
+        answer_letters = {
+            letter for answer in ANSWER_PATTERN.findall(response) for letter in answer
+        }
+        selected_options = [
+            options[letter] for letter in sorted(answer_letters) if letter in options
+        ]
+        if not options or not selected_options:
+            raise NothingToEvaluate(
+                "No A-D options found in query or no valid selection; skipped."
+            )
+
+        # Compute the expressions outside the f-string
+        context_text = "\n".join(contexts)
+        selected_answers_text = ', '.join(selected_options)
 
         prompt_args = {
             "query": query,
             "context_text": context_text,
             "selected_answers_text": selected_answers_text
         }
+        return DEFAULT_EVAL_TEMPLATE, prompt_args
 
-        eval_response = self._llm.predict(prompt_template, **prompt_args).strip()
+    def _skipped_evaluation(
+        self,
+        query: str,
+        response: str,
+        contexts: Sequence[str],
+        reason: str,
+    ) -> Mapping[str, EvaluationResult]:
+        return {
+            'context_relevance': EvaluationResult(
+                query=query,
+                response=response,
+                contexts=contexts,
+                passing=False,
+                score=0.0,
+                feedback=reason,
+            )
+        }
 
-        # Parse the response
+    def _parse_evaluation(
+        self,
+        query: str,
+        response: str,
+        contexts: Sequence[str],
+        eval_response: str,
+    ) -> Mapping[str, EvaluationResult]:
         lines = eval_response.strip().split('\n')
         score_line = next((line for line in lines if line.startswith('Score:')), None)
         explanation_lines = [line for line in lines if line.startswith('Explanation:') or not line.startswith('Score:')]
@@ -111,6 +183,4 @@ class ContextRelevanceEvaluator:
         return {'context_relevance': eval_result}
 
     def _extract_options_from_query(self, query: str) -> dict:
-        pattern = r'([A-D])\.\s*(.+)'
-        options = dict(re.findall(pattern, query))
-        return options
+        return dict(OPTION_PATTERN.findall(query))
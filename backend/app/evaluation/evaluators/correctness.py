@@ -1,23 +1,10 @@
-import time
-from typing import Optional, Sequence, Mapping
-from llama_index.core.evaluation.base import EvaluationResult
-from deepeval import evaluate
 from deepeval.test_case import LLMTestCase
 from deepeval.metrics import AnswerRelevancyMetric
 
+from .base import DeepEvalEvaluator, get_deepeval_model
 
-max_retries = 3
-retry_delay = 2
 
-class CorrectnessEvaluator:
-    def __init__(self, model="gpt-4o", threshold=0.7) -> None:
-        self._model = model
-        self._threshold = threshold
-        self._correctness_metric = AnswerRelevancyMetric(
-            threshold=self._threshold, model=self._model, include_reason=True
-        )
-        
-        self._prompt_template =  """
+DEFAULT_PROMPT_TEMPLATE = """
 You are an expert evaluator specializing in assessing the correctness of answers to multiple-choice questions.
 
 **Objective:**
@@ -64,70 +51,26 @@ Explanation: <your explanation>
 
 """
 
-    def evaluate(
-        self,
-        query: Optional[str] = None,
-        response: Optional[str] = None,
-        contexts: Optional[Sequence[str]] = None,
-        reference: Optional[str] = None,
-    ) -> Mapping[str, EvaluationResult]:
-        test_case = LLMTestCase(
+
+class CorrectnessEvaluator(DeepEvalEvaluator):
+    _prompt_template = DEFAULT_PROMPT_TEMPLATE
+
+    def __init__(self, model="gpt-4o", threshold=0.7, cache=None) -> None:
+        self._model = get_deepeval_model(model)
+        self._model_name = self._model.get_model_name()
+        self._threshold = threshold
+        self._cache = cache
+        self._correctness_metric = AnswerRelevancyMetric(
+            threshold=self._threshold, model=self._model, include_reason=True
+        )
+
+    def _deepeval_metrics(self):
+        return [self._correctness_metric]
+
+    def _test_case(self, query, response, contexts, reference) -> LLMTestCase:
+        return LLMTestCase(
             input=query,
             actual_output=response.strip(),
             expected_output=reference.strip(),
             retrieval_context=contexts,
         )
-
-        evaluation_results = None
-        for attempt in range(max_retries):
-            try:
-                evaluation_results = evaluate(
-                    test_cases=[test_case],
-                    metrics=[self._correctness_metric],
-                    print_results=False,
-                    show_indicator=False,
-                    hyperparameters={
-                        "model": self._model,
-                        "prompt template": self._prompt_template
-                    },
-                    
-                )
-                break  # Exit loop if successful
-            except ValueError as e:
-                print(f"Caught ValueError: {e}")
-                print(f"Retrying {attempt + 1}/{max_retries}...")
-                time.sleep(retry_delay)
-
-        if not evaluation_results:
-            print("No evaluation results were returned.")
-            return {}
-
-        
-
-        metrics_results = {}
-
-        # Access test_results from evaluation_results
-        if hasattr(evaluation_results, 'test_results'):
-            test_results = evaluation_results.test_results
-        elif isinstance(evaluation_results, dict) and 'test_results' in evaluation_results:
-            test_results = evaluation_results['test_results']
-        else:
-            print("Unexpected structure of evaluation_results.")
-            return {}
-
-        if not test_results:
-            print("test_results is None or empty.")
-            return {}
-
-        for test_result in test_results:
-            for metric_data in test_result.metrics_data:
-                metrics_results[metric_data.name] = EvaluationResult(
-                    query=query,
-                    response=response,
-                    contexts=contexts,
-                    passing=metric_data.success,
-                    score=metric_data.score or 0.0,
-                    feedback=metric_data.reason or metric_data.error,
-                )
-
-        return metrics_results
@@ -0,0 +1,40 @@
+import threading
+from typing import List
+
+from cachetools import LRUCache
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Memoizes the embeddings of the texts by an underlying embedding model, so
+    the RAGAS metrics measuring the same test case don't embed the same
+    question again.
+    """
+
+    def __init__(self, embeddings: Embeddings, maxsize: int = 4096):
+        self._embeddings = embeddings
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        # The RAGAS metrics are measured in threads.
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            cached = {text: self._cache.get(text) for text in texts}
+        missing = [text for text, vector in cached.items() if vector is None]
+        if missing:
+            vectors = self._embeddings.embed_documents(missing)
+            with self._lock:
+                for text, vector in zip(missing, vectors):
+                    self._cache[text] = vector
+            cached.update(zip(missing, vectors))
+        return [cached[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            vector = self._cache.get(text)
+        if vector is None:
+            vector = self._embeddings.embed_query(text)
+            with self._lock:
+                self._cache[text] = vector
+        return vector
@@ -29,6 +29,9 @@ class EvaluationData(BaseModel):
     )
 
 
+DEFAULT_OUTPUT_PARSER = PydanticOutputParser(output_cls=EvaluationData)
+
+
 class LanguageEvaluator(BaseEvaluator):
     """Language evaluator.
 
@@ -63,9 +66,7 @@ class LanguageEvaluator(BaseEvaluator):
         else:
             self._eval_template = eval_template or DEFAULT_EVAL_TEMPLATE
 
-        self._output_parser = output_parser or PydanticOutputParser(
-            output_cls=EvaluationData
-        )
+        self._output_parser = output_parser or DEFAULT_OUTPUT_PARSER
         self._eval_template.output_parser = self._output_parser
 
     def _get_prompts(self) -> PromptDictType:
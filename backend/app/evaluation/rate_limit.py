@@ -0,0 +1,23 @@
+import asyncio
+
+
+class RateLimiter:
+    """
+    Spaces out the calls to `wait` so that at most `max_per_second` of them
+    return per second, 0 disables the limit.
+    """
+
+    def __init__(self, max_per_second: float):
+        self._interval = 1 / max_per_second if max_per_second > 0 else 0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self._interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self._interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
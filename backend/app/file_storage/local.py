@@ -14,8 +14,14 @@ class LocalFileStorage(FileStorage):
 
     def save(self, name: str, content: IO) -> None:
         path = self.path(name)
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "wb") as f:
+        try:
+            f = open(path, "wb")
+        except FileNotFoundError:
+            # Only the first file saved in a directory creates it, instead
+            # of walking the directory chain on every save.
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(path, "wb")
+        with f:
             f.write(content.read())
 
     def delete(self, name: str) -> None:
@@ -12,6 +12,7 @@ from .feedback import (
     AdminFeedbackPublic,
 )
 from .semantic_cache import SemanticCache
+from .retrieve_cache import RetrieveCacheEntry
 from .staff_action_log import StaffActionLog
 from .chat_engine import ChatEngine, ChatEngineUpdate
 from .chat import Chat, ChatUpdate, ChatVisibility
@@ -15,7 +15,7 @@ from app.models.base import UpdatableBaseModel, UUIDBaseModel
 
 
 class User(UUIDBaseModel, UpdatableBaseModel, table=True):
-    email: EmailStr = Field(index=True, unique=True, nullable=False)
+    email: EmailStr = Field(max_length=255, index=True, unique=True, nullable=False)
     hashed_password: str
     is_active: bool = Field(True, nullable=False)
     is_superuser: bool = Field(False, nullable=False)
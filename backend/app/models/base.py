@@ -1,10 +1,13 @@
 import json
+import numpy as np
 from uuid import UUID
 from datetime import datetime
 from typing import Optional
 
 from sqlmodel import Field, DateTime, func, SQLModel
+from sqlalchemy import Index
 from sqlalchemy.types import TypeDecorator, LargeBinary
+from pgvector.sqlalchemy import Vector, HALFVEC
 
 from app.utils.uuid6 import uuid7
 from app.utils.aes import AESCipher
@@ -34,6 +37,58 @@ class UpdatableBaseModel(SQLModel):
     )
 
 
+class HalfPrecisionVector(TypeDecorator):
+    """
+    Stores embeddings as `halfvec` but hands them back as float32 numpy
+    arrays, the same as `Vector` does, so callers don't need to care.
+    """
+
+    impl = HALFVEC
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        if value is not None:
+            return np.array(value.to_list(), dtype=np.float32)
+        return value
+
+
+def embedding_vector_type():
+    if settings.VECTOR_HALF_PRECISION:
+        return HalfPrecisionVector(settings.EMBEDDING_DIMS)
+    return Vector(settings.EMBEDDING_DIMS)
+
+
+def hnsw_index_params(dims: int, est_rows: int) -> dict:
+    # Fewer edges per node keep builds on small tables cheap, while large
+    # tables need a denser graph to avoid falling off a recall cliff.
+    if est_rows < 100_000:
+        m, ef_construction = 16, 64
+    elif est_rows < 1_000_000:
+        m, ef_construction = 24, 100
+    else:
+        m, ef_construction = 32, 128
+    # High dimensional embeddings need a wider candidate list during build.
+    if dims > 1024:
+        ef_construction = ef_construction * 5 // 4
+    return {"m": m, "ef_construction": ef_construction}
+
+
+def hnsw_cosine_index(name: str, column: str) -> Index:
+    # Keep in sync with the HNSW indexes created by the alembic migrations,
+    # otherwise autogenerate will try to drop them. The migrations pick the
+    # build parameters from the table size, see `hnsw_index_params`.
+    opclass = (
+        "halfvec_cosine_ops" if settings.VECTOR_HALF_PRECISION else "vector_cosine_ops"
+    )
+    return Index(
+        name,
+        column,
+        postgresql_using="hnsw",
+        postgresql_with={"m": 24, "ef_construction": 128},
+        postgresql_ops={column: opclass},
+    )
+
+
 def get_aes_key() -> bytes:
     return settings.SECRET_KEY.encode()[:32]
 
@@ -8,10 +8,11 @@ from sqlmodel import (
     Field,
     Column,
     DateTime,
-    JSON,
     SmallInteger,
     Relationship as SQLRelationship,
 )
+from sqlalchemy import Index
+from sqlalchemy.dialects.postgresql import JSONB
 
 from .base import UUIDBaseModel, UpdatableBaseModel
 
@@ -31,7 +32,7 @@ class Chat(UUIDBaseModel, UpdatableBaseModel, table=True):
         },
     )
     # FIXME: why fastapi_pagination return string(json) instead of dict?
-    engine_options: Dict | str = Field(default={}, sa_column=Column(JSON))
+    engine_options: Dict | str = Field(default={}, sa_column=Column(JSONB))
     deleted_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime))
     user_id: UUID = Field(foreign_key="users.id", nullable=True)
     user: "User" = SQLRelationship(
@@ -47,6 +48,10 @@ class Chat(UUIDBaseModel, UpdatableBaseModel, table=True):
     )
 
     __tablename__ = "chats"
+    __table_args__ = (
+        Index("ix_chats_browser_id_created_at", "browser_id", "created_at"),
+        Index("ix_chats_user_id", "user_id"),
+    )
 
 
 class ChatUpdate(BaseModel):
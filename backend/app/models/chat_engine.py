@@ -5,10 +5,10 @@ from datetime import datetime
 from sqlmodel import (
     Field,
     Column,
-    JSON,
     DateTime,
     Relationship as SQLRelationship,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 
 from .base import UpdatableBaseModel
 
@@ -16,7 +16,7 @@ from .base import UpdatableBaseModel
 class ChatEngine(UpdatableBaseModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(max_length=256)
-    engine_options: Dict = Field(default={}, sa_column=Column(JSON))
+    engine_options: Dict = Field(default={}, sa_column=Column(JSONB))
     llm_id: Optional[int] = Field(foreign_key="llms.id", nullable=True)
     llm: "LLM" = SQLRelationship(
         sa_relationship_kwargs={
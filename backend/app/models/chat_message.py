@@ -8,19 +8,22 @@ from sqlmodel import (
     DateTime,
     Text,
     JSON,
+    BigInteger,
     Relationship as SQLRelationship,
 )
+from sqlalchemy import Index
+from sqlalchemy.dialects.postgresql import JSONB
 
 from .base import UpdatableBaseModel
 
 
 class ChatMessage(UpdatableBaseModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=BigInteger)
     ordinal: int = Field(default=0)
     role: str = Field(max_length=64)
     content: str = Field(sa_column=Column(Text))
     error: Optional[str] = Field(sa_column=Column(Text))
-    sources: List = Field(default=[], sa_column=Column(JSON))
+    sources: List = Field(default=[], sa_column=Column(JSONB))
     graph_data: dict = Field(default={}, sa_column=Column(JSON))
     meta: dict = Field(default={}, sa_column=Column(JSON))
     trace_url: Optional[str] = Field(max_length=512)
@@ -45,3 +48,6 @@ class ChatMessage(UpdatableBaseModel, table=True):
     )
 
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_chat_id_ordinal", "chat_id", "ordinal"),
+    )
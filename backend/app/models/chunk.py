@@ -9,12 +9,11 @@ from sqlmodel import (
     Relationship as SQLRelationship,
 )
 # from tidb_vector.sqlalchemy import VectorType
-from pgvector.sqlalchemy import Vector
+from sqlalchemy import Enum, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from llama_index.core.schema import TextNode
-from app.core.config import settings
 
-from app.core.config import settings
-from .base import UpdatableBaseModel, UUIDBaseModel
+from .base import UpdatableBaseModel, UUIDBaseModel, embedding_vector_type, hnsw_cosine_index
 
 
 class KgIndexStatus(str, enum.Enum):
@@ -26,25 +25,51 @@ class KgIndexStatus(str, enum.Enum):
 
 
 class Chunk(UUIDBaseModel, UpdatableBaseModel, table=True):
-    hash: str = Field(max_length=64)
+    hash: str = Field(max_length=64, index=True)
     text: str = Field(sa_column=Column(Text))
-    meta: dict | list = Field(default={}, sa_column=Column(JSON))
+    meta: dict | list = Field(default={}, sa_column=Column(JSONB))
     embedding: Any = Field(
-        sa_column=Column(Vector(settings.EMBEDDING_DIMS), comment="hnsw(distance=cosine)")
+        sa_column=Column(embedding_vector_type(), comment="hnsw(distance=cosine)")
     )
-    document_id: int = Field(foreign_key="documents.id", nullable=True)
+    document_id: int = Field(foreign_key="documents.id", nullable=True, index=True)
+    # Not eagerly joined: that pulled the whole documents.content into every
+    # chunk load, once per chunk. Queries only use it for `Chunk.document.has()`.
     document: "Document" = SQLRelationship(
         sa_relationship_kwargs={
-            "lazy": "joined",
+            "lazy": "select",
             "primaryjoin": "Chunk.document_id == Document.id",
         },
     )
     relations: dict | list = Field(default={}, sa_column=Column(JSON))
     source_uri: str = Field(max_length=512, nullable=True)
-    index_status: KgIndexStatus = KgIndexStatus.NOT_STARTED
+    # Stored as a CHECK constrained VARCHAR instead of a native enum type, so
+    # adding a status doesn't need an ALTER TYPE.
+    index_status: KgIndexStatus = Field(
+        default=KgIndexStatus.NOT_STARTED,
+        sa_column=Column(
+            Enum(
+                KgIndexStatus,
+                native_enum=False,
+                length=16,
+                create_constraint=True,
+                name="ck_chunks_index_status",
+            ),
+            nullable=False,
+        ),
+    )
     index_result: str = Field(sa_column=Column(Text, nullable=True))
 
     __tablename__ = "chunks"
+    __table_args__ = (
+        hnsw_cosine_index("ix_chunks_embedding_hnsw", "embedding"),
+        # Serves the `meta @> {...}` metadata filters of the vector store.
+        Index(
+            "ix_chunks_meta_gin",
+            "meta",
+            postgresql_using="gin",
+            postgresql_ops={"meta": "jsonb_path_ops"},
+        ),
+    )
 
     def to_llama_text_node(self) -> TextNode:
         return TextNode(
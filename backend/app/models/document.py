@@ -4,13 +4,14 @@ from datetime import datetime
 
 from llama_index.core.schema import Document as LlamaDocument
 from pydantic import ConfigDict
+from sqlalchemy import Enum, Index
 from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import (
     Field,
     Column,
     Text,
     DateTime,
-    JSON,
     String,
 )
 
@@ -31,19 +32,36 @@ class Document(UpdatableBaseModel, table=True):
     model_config = ConfigDict(use_enum_values=True)
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    hash: str = Field(max_length=32)
+    hash: str = Field(max_length=32, index=True)
     name: str = Field(max_length=256)
     content: str = Field(sa_column=Column(Text))
     mime_type: str = Field(max_length=64)
     source_uri: str = Field(max_length=512)
-    meta: dict | list = Field(default={}, sa_column=Column(JSON))
+    meta: dict | list = Field(default={}, sa_column=Column(JSONB))
     # the last time the document was modified in the source system
     last_modified_at: Optional[datetime] = Field(sa_column=Column(DateTime))
-    index_status: DocIndexTaskStatus = DocIndexTaskStatus.NOT_STARTED
+    # Stored as a CHECK constrained VARCHAR instead of a native enum type, so
+    # adding a status doesn't need an ALTER TYPE.
+    index_status: DocIndexTaskStatus = Field(
+        default=DocIndexTaskStatus.NOT_STARTED,
+        sa_column=Column(
+            Enum(
+                DocIndexTaskStatus,
+                native_enum=False,
+                length=16,
+                create_constraint=True,
+                name="ck_documents_index_status",
+            ),
+            nullable=False,
+        ),
+    )
     index_result: str = Field(sa_column=Column(Text, nullable=True))
     data_source_id: int = Field(nullable=True)
 
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_data_source_id_index_status", "data_source_id", "index_status"),
+    )
 
     def to_llama_document(self) -> LlamaDocument:
         return LlamaDocument(
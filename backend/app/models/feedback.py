@@ -4,6 +4,7 @@ from typing import Optional
 
 from sqlmodel import (
     Field,
+    BigInteger,
     Relationship as SQLRelationship,
 )
 
@@ -38,7 +39,7 @@ class Feedback(BaseFeedback, table=True):
             "primaryjoin": "Feedback.chat_id == Chat.id",
         },
     )
-    chat_message_id: int = Field(foreign_key="chat_messages.id")
+    chat_message_id: int = Field(foreign_key="chat_messages.id", sa_type=BigInteger)
     chat_message: "ChatMessage" = SQLRelationship(
         sa_relationship_kwargs={
             "lazy": "joined",
@@ -12,11 +12,11 @@ from sqlmodel import (
     Text,
     Relationship as SQLModelRelationship,
     DateTime,
+    BigInteger,
 )
 # from tidb_vector.sqlalchemy import VectorType
-from pgvector.sqlalchemy import Vector
 from sqlalchemy import Index
-from app.core.config import settings
+from .base import embedding_vector_type, hnsw_cosine_index
 
 class EntityType(str, enum.Enum):
     original = "original"
@@ -35,16 +35,20 @@ class EntityBase(SQLModel):
 
 
 class Entity(EntityBase, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=BigInteger)
     description_vec: Any = Field(
-        sa_column=Column(Vector(settings.EMBEDDING_DIMS), comment="hnsw(distance=cosine)")
+        sa_column=Column(embedding_vector_type(), comment="hnsw(distance=cosine)")
     )
     meta_vec: Any = Field(
-        sa_column=Column(Vector(settings.EMBEDDING_DIMS), comment="hnsw(distance=cosine)")
+        sa_column=Column(embedding_vector_type(), comment="hnsw(distance=cosine)")
     )
 
     __tablename__ = "entities"
-    __table_args__ = (Index("idx_entity_type", "entity_type"),)
+    __table_args__ = (
+        Index("idx_entity_type", "entity_type"),
+        hnsw_cosine_index("ix_entities_description_vec_hnsw", "description_vec"),
+        hnsw_cosine_index("ix_entities_meta_vec_hnsw", "meta_vec"),
+    )
 
     def __hash__(self):
         return hash(self.id)
@@ -64,17 +68,17 @@ class RelationshipBase(SQLModel):
     description: str = Field(sa_column=Column(Text))
     meta: List | Dict = Field(default={}, sa_column=Column(JSON))
     weight: int = 0
-    source_entity_id: int = Field(foreign_key="entities.id")
-    target_entity_id: int = Field(foreign_key="entities.id")
+    source_entity_id: int = Field(foreign_key="entities.id", sa_type=BigInteger)
+    target_entity_id: int = Field(foreign_key="entities.id", sa_type=BigInteger)
     last_modified_at: Optional[datetime] = Field(sa_column=Column(DateTime))
     document_id: Optional[int] = Field(default=None, nullable=True)
     chunk_id: Optional[UUID] = Field(default=None, nullable=True)
 
 
 class Relationship(RelationshipBase, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=BigInteger)
     description_vec: Any = Field(
-        sa_column=Column(Vector(settings.EMBEDDING_DIMS), comment="hnsw(distance=cosine)")
+        sa_column=Column(embedding_vector_type(), comment="hnsw(distance=cosine)")
     )
     source_entity: Entity = SQLModelRelationship(
         sa_relationship_kwargs={
@@ -90,6 +94,9 @@ class Relationship(RelationshipBase, table=True):
     )
 
     __tablename__ = "relationships"
+    __table_args__ = (
+        hnsw_cosine_index("ix_relationships_description_vec_hnsw", "description_vec"),
+    )
 
     def __hash__(self):
         return hash(self.id)
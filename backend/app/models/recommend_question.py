@@ -4,6 +4,7 @@ from sqlmodel import (
     Field,
     Column,
     JSON,
+    BigInteger,
     Relationship as SQLRelationship,
 )
 
@@ -13,7 +14,9 @@ from .base import UpdatableBaseModel
 class RecommendQuestion(UpdatableBaseModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     questions: List = Field(default=[], sa_column=Column(JSON))
-    chat_message_id: int = Field(foreign_key="chat_messages.id", index=True)
+    chat_message_id: int = Field(
+        foreign_key="chat_messages.id", index=True, sa_type=BigInteger
+    )
     chat_message: "ChatMessage" = SQLRelationship(
         sa_relationship_kwargs={
             "lazy": "joined",
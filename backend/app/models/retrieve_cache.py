@@ -0,0 +1,38 @@
+from typing import Optional, Any
+from datetime import datetime
+
+from sqlalchemy import Index, LargeBinary
+from sqlmodel import (
+    SQLModel,
+    Field,
+    Column,
+    Integer,
+    String,
+    func,
+    DateTime,
+)
+
+from .base import embedding_vector_type
+
+
+class RetrieveCacheEntry(SQLModel, table=True):
+    id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, primary_key=True, autoincrement=True),
+    )
+    # The chat engine, the kind of results and top_k they were retrieved with.
+    namespace: str = Field(sa_column=Column(String(256), nullable=False))
+    query_vec: Any = Field(sa_column=Column(embedding_vector_type(), nullable=False))
+    # Pickled retrieve results.
+    value: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    created_at: datetime = Field(
+        sa_column=Column(DateTime, nullable=False, server_default=func.now())
+    )
+
+    __tablename__ = "retrieve_cache"
+    # A namespace holds at most SEMANTIC_CACHE_MAX_ENTRIES entries, the
+    # similarity search scans them exactly instead of going through an
+    # approximate (HNSW) index over every namespace.
+    __table_args__ = (
+        Index("ix_retrieve_cache_namespace_created_at", "namespace", "created_at"),
+    )
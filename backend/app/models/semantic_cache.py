@@ -1,6 +1,5 @@
 from typing import Optional, Any, List, Dict
 from datetime import datetime
-from app.core.config import settings
 
 from sqlmodel import (
     SQLModel,
@@ -8,28 +7,29 @@ from sqlmodel import (
     Column,
     JSON,
     Text,
+    Integer,
     func,
     DateTime,
 )
 # from tidb_vector.sqlalchemy import VectorType
-from pgvector.sqlalchemy import Vector
 
-from app.core.config import settings
+from .base import embedding_vector_type, hnsw_cosine_index
 
 
 class SemanticCache(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
+    id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, primary_key=True, autoincrement=True),
+    )
     query: str = Field(sa_column=Column(Text))
     query_vec: Any = Field(
-        sa_column=Column(Vector(settings.EMBEDDING_DIMS), comment="hnsw(distance=cosine)")
+        sa_column=Column(embedding_vector_type(), comment="hnsw(distance=cosine)")
     )
     value: str = Field(sa_column=Column(Text))
-    value_vec: Any = Field(
-        sa_column=Column(Vector(settings.EMBEDDING_DIMS), comment="hnsw(distance=cosine)")
-    )
     meta: List | Dict = Field(default={}, sa_column=Column(JSON))
+    # Part of the primary key because the table is partitioned by month on it.
     created_at: datetime = Field(
-        sa_column=Column(DateTime, server_default=func.now(), nullable=True)
+        sa_column=Column(DateTime, primary_key=True, server_default=func.now())
     )
     updated_at: datetime = Field(
         sa_column=Column(
@@ -38,10 +38,14 @@ class SemanticCache(SQLModel, table=True):
     )
 
     __tablename__ = "semantic_cache"
-    __table_args__ = {
-        # Ref: https://docs.pingcap.com/tidb/stable/time-to-live
-        "mysql_TTL": "created_at + INTERVAL 1 MONTH;",
-    }
+    __table_args__ = (
+        hnsw_cosine_index("ix_semantic_cache_query_vec_hnsw", "query_vec"),
+        {
+            # Expired months are dropped as whole partitions by the
+            # maintain_semantic_cache_partitions task.
+            "postgresql_partition_by": "RANGE (created_at)",
+        },
+    )
 
     def __hash__(self):
         return hash(self.id)
@@ -49,4 +53,4 @@ class SemanticCache(SQLModel, table=True):
     # screenshot method is used to return a dictionary representation of the object
     # that can be used for recording or debugging purposes
     def screenshot(self):
-        return self.model_dump(exclude={"query_vec", "value_vec"})
+        return self.model_dump(exclude={"query_vec"})
@@ -1,15 +1,15 @@
 from typing import Optional, Dict
 from datetime import datetime
 
-from sqlmodel import SQLModel, Field, Column, JSON, DateTime, func
+from sqlmodel import SQLModel, Field, Column, JSON, DateTime, BigInteger, func
 
 
 class StaffActionLog(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    action: str
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=BigInteger)
+    action: str = Field(max_length=64)
     action_time: datetime = Field(sa_column=Column(DateTime, server_default=func.now()))
-    target_type: str
-    target_id: int
+    target_type: str = Field(max_length=64)
+    target_id: int = Field(sa_type=BigInteger)
     before: Dict = Field(default_factory=dict, sa_column=Column(JSON))
     after: Dict = Field(default_factory=dict, sa_column=Column(JSON))
 
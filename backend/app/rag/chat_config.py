@@ -1,9 +1,12 @@
 import os
 import json
 import logging
+import threading
 from typing import Optional
 
 import dspy
+import redis
+from cachetools import TTLCache
 from llama_index.llms.bedrock.utils import BEDROCK_FOUNDATION_LLMS
 from pydantic import BaseModel
 from llama_index.llms.openai.utils import DEFAULT_OPENAI_API_BASE
@@ -49,12 +52,70 @@ from app.models import (
     EmbeddingModel as DBEmbeddingModel,
     RerankerModel as DBRerankerModel,
 )
+from app.core.config import settings
 from app.repositories import chat_engine_repo
+from app.rag.semantic_cache import retrieve_cache
 from app.rag.llms.anthropic_vertex import AnthropicVertex
 from app.utils.dspy import get_dspy_lm_by_llama_llm
 
 logger = logging.getLogger(__name__)
 
+# Chat engines are loaded at the start of every chat and retrieve request but
+# rarely change. Configs are cached per process for a minute, and changes are
+# broadcast on a Redis channel so every process drops its copy right away.
+CHAT_ENGINE_INVALIDATE_CHANNEL = "chat_engine_invalidate"
+_chat_engine_config_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_chat_engine_config_cache_lock = threading.Lock()
+_invalidation_listener_lock = threading.Lock()
+_invalidation_listener = None
+_invalidation_callbacks = []
+
+
+def register_chat_engine_invalidation_callback(callback):
+    """Call `callback()` whenever the cached chat engine configs are dropped."""
+    _invalidation_callbacks.append(callback)
+
+
+def _clear_chat_engine_config_cache(message=None):
+    with _chat_engine_config_cache_lock:
+        _chat_engine_config_cache.clear()
+    for callback in _invalidation_callbacks:
+        callback()
+
+
+def _ensure_invalidation_listener():
+    global _invalidation_listener
+    if _invalidation_listener is not None:
+        return
+    with _invalidation_listener_lock:
+        if _invalidation_listener is not None:
+            return
+        try:
+            pubsub = redis.Redis.from_url(settings.CELERY_BROKER_URL).pubsub(
+                ignore_subscribe_messages=True
+            )
+            pubsub.subscribe(
+                **{CHAT_ENGINE_INVALIDATE_CHANNEL: _clear_chat_engine_config_cache}
+            )
+            _invalidation_listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except redis.RedisError as e:
+            # Don't retry on every request, the TTL still bounds staleness.
+            logger.warning(f"Failed to subscribe to chat engine invalidations: {e}")
+            _invalidation_listener = False
+
+
+def invalidate_chat_engine_config_cache():
+    _clear_chat_engine_config_cache()
+    # Shared by all processes, so cleared once here rather than by every
+    # process receiving the invalidation.
+    retrieve_cache.clear()
+    try:
+        redis.Redis.from_url(settings.CELERY_BROKER_URL).publish(
+            CHAT_ENGINE_INVALIDATE_CHANNEL, "*"
+        )
+    except redis.RedisError as e:
+        logger.warning(f"Failed to publish chat engine invalidation: {e}")
+
 
 class LLMOption(BaseModel):
     intent_graph_knowledge: str = DEFAULT_INTENT_GRAPH_KNOWLEDGE
@@ -84,6 +145,10 @@ class ExternalChatEngine(BaseModel):
     stream_chat_api_url: str = None
 
 
+def _detached_copy(model_cls, db_obj):
+    return model_cls.model_validate(db_obj) if db_obj is not None else None
+
+
 class ChatEngineConfig(BaseModel):
     llm: LLMOption = LLMOption()
     knowledge_graph: KnowledgeGraphOption = KnowledgeGraphOption()
@@ -104,6 +169,18 @@ class ChatEngineConfig(BaseModel):
 
     @classmethod
     def load_from_db(cls, session: Session, engine_name: str) -> "ChatEngineConfig":
+        _ensure_invalidation_listener()
+        cache_key = engine_name or "default"
+        with _chat_engine_config_cache_lock:
+            obj = _chat_engine_config_cache.get(cache_key)
+        if obj is None:
+            obj = cls._load_from_db(session, engine_name)
+            with _chat_engine_config_cache_lock:
+                _chat_engine_config_cache[cache_key] = obj
+        return obj.model_copy()
+
+    @classmethod
+    def _load_from_db(cls, session: Session, engine_name: str) -> "ChatEngineConfig":
         if not engine_name or engine_name == "default":
             db_chat_engine = chat_engine_repo.get_default_engine(session)
         else:
@@ -115,11 +192,13 @@ class ChatEngineConfig(BaseModel):
             )
             db_chat_engine = chat_engine_repo.get_default_engine(session)
 
+        # The config outlives the session, keep detached copies of the rows
+        # (without their relationships) instead of the session's instances.
         obj = cls.model_validate(db_chat_engine.engine_options)
-        obj._db_chat_engine = db_chat_engine
-        obj._db_llm = db_chat_engine.llm
-        obj._db_fast_llm = db_chat_engine.fast_llm
-        obj._db_reranker = db_chat_engine.reranker
+        obj._db_chat_engine = DBChatEngine.model_validate(db_chat_engine)
+        obj._db_llm = _detached_copy(DBLLM, db_chat_engine.llm)
+        obj._db_fast_llm = _detached_copy(DBLLM, db_chat_engine.fast_llm)
+        obj._db_reranker = _detached_copy(DBRerankerModel, db_chat_engine.reranker)
         return obj
 
     def get_llama_llm(self, session: Session) -> LLM:
@@ -261,6 +340,9 @@ def get_embedding_model(
     config: dict,
     credentials: str | list | dict | None,
 ) -> BaseEmbedding:
+    # Copy so the config of the DB object isn't modified by the pops below,
+    # the batch size can still be overridden per model in its config.
+    config = {"embed_batch_size": settings.EMBEDDING_BATCH_SIZE, **config}
     match provider:
         case EmbeddingProvider.OPENAI:
             api_base = config.pop("api_base", DEFAULT_OPENAI_API_BASE)
@@ -280,6 +362,7 @@ def get_embedding_model(
             return CohereEmbedding(
                 model_name=model,
                 cohere_api_key=credentials,
+                embed_batch_size=config["embed_batch_size"],
             )
         case EmbeddingProvider.OLLAMA:
             return OllamaEmbedding(
@@ -1,47 +1,67 @@
+import asyncio
 import logging
 from datetime import datetime, UTC
-from typing import Generator
-from playwright.sync_api import sync_playwright
+from typing import AsyncGenerator, Generator, Tuple
+from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 from markdownify import MarkdownConverter
 
 from app.models import Document
+from app.utils.hash import content_hash
 from app.rag.datasource.consts import IGNORE_TAGS, IGNORE_CLASSES
 
 logger = logging.getLogger(__name__)
 
 
+def _is_data_uri(src: str | None) -> bool:
+    return src is not None and src.startswith("data:")
+
+
+# Loading a page is bound by the network and the site, so several pages are
+# loaded at the same time.
+WEB_LOAD_CONCURRENCY = 8
+
+
 def load_web_documents(
     data_source_id: int, urls: list[str]
 ) -> Generator[Document, None, None]:
-    visited = set()
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        for url in urls:
-            page = browser.new_page()
-            response = page.goto(url)
-            final_url = page.url
+    # The pages are loaded concurrently on an event loop of our own, the
+    # documents are still yielded one by one, in the order of the urls.
+    loop = asyncio.new_event_loop()
+    pages = _aload_web_pages(urls)
+    try:
+        visited = set()
+        while True:
+            try:
+                url, final_url, status, html, title = loop.run_until_complete(
+                    pages.__anext__()
+                )
+            except StopAsyncIteration:
+                break
             if final_url in visited:
                 continue
 
-            if response.status >= 400:
+            if status >= 400:
                 logger.error(
-                    f"Failed to load page: {url}, response status: {response.status()}, skipping"
+                    f"Failed to load page: {url}, response status: {status}, skipping"
                 )
                 continue
-            soup = BeautifulSoup(page.content(), "html.parser")
+            soup = BeautifulSoup(html, "html.parser")
             for t in IGNORE_TAGS:
                 for tag in soup.find_all(t):
                     tag.extract()
             for c in IGNORE_CLASSES:
                 for tag in soup.find_all(class_=c):
                     tag.extract()
+            # Inline images would end up in the content as base64, sent to the
+            # embedding model and the LLM with every chunk they are in.
+            for tag in soup.find_all("img", src=_is_data_uri):
+                tag.extract()
             content = MarkdownConverter().convert_soup(soup)
-            title = page.title()
             visited.add(final_url)
             document = Document(
                 name=title,
-                hash=hash(content),
+                hash=content_hash(content),
                 content=content,
                 mime_type="text/plain",
                 data_source_id=data_source_id,
@@ -49,4 +69,36 @@ def load_web_documents(
                 last_modified_at=datetime.now(UTC),
             )
             yield document
-        browser.close()
+    finally:
+        loop.run_until_complete(pages.aclose())
+        loop.close()
+
+
+async def _aload_web_pages(
+    urls: list[str],
+) -> AsyncGenerator[Tuple[str, str, int, str, str], None]:
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        semaphore = asyncio.Semaphore(WEB_LOAD_CONCURRENCY)
+
+        async def load(url: str) -> Tuple[str, str, int, str, str]:
+            async with semaphore:
+                page = await browser.new_page()
+                try:
+                    response = await page.goto(url)
+                    # No response means the url was the same page with
+                    # another anchor, it loaded fine.
+                    status = response.status if response is not None else 200
+                    return url, page.url, status, await page.content(), await page.title()
+                finally:
+                    await page.close()
+
+        tasks = [asyncio.create_task(load(url)) for url in urls]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await browser.close()
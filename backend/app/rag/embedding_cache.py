@@ -0,0 +1,77 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from app.core.config import settings
+
+
+class EmbeddingCache:
+    """
+    An in-process LRU cache of query embeddings with a TTL, so the same
+    question asked again doesn't go through the embedding API.
+
+    Keys are the SHA-256 of the embedding model and the whitespace normalized
+    text, entries older than `ttl` seconds are dropped when they are read or
+    when the cache is full.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, List[float]]] = OrderedDict()
+        # RetrieveService runs in the threadpool.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(embed_model: BaseEmbedding, text: str) -> str:
+        normalized = " ".join(text.split())
+        model = f"{type(embed_model).__name__}:{embed_model.model_name}"
+        return hashlib.sha256(f"{model}\n{normalized}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, embedding = entry
+            if time.monotonic() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return embedding
+
+    def set(self, key: str, embedding: List[float]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._sweep()
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _sweep(self):
+        expired_before = time.monotonic() - self.ttl
+        for key in [k for k, (t, _) in self._entries.items() if t < expired_before]:
+            del self._entries[key]
+
+
+embedding_cache = EmbeddingCache(
+    max_size=settings.EMBEDDING_CACHE_SIZE,
+    ttl=settings.EMBEDDING_CACHE_TTL,
+)
+
+
+def embed_query_with_cache(embed_model: BaseEmbedding, text: str) -> List[float]:
+    if settings.EMBEDDING_CACHE_SIZE <= 0:
+        return embed_model.get_query_embedding(text)
+
+    key = embedding_cache.make_key(embed_model, text)
+    embedding = embedding_cache.get(key)
+    if embedding is None:
+        embedding = embed_model.get_query_embedding(text)
+        embedding_cache.set(key, embedding)
+    return embedding
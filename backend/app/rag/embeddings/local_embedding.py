@@ -1,5 +1,6 @@
 """Jina embeddings file."""
 
+import asyncio
 from typing import Any, List, Optional
 import requests
 
@@ -33,8 +34,23 @@ class _APICaller:
             'Content-Type': 'application/json',
         }
 
+    @staticmethod
+    def _batches(sentences: list[str]) -> List[list[str]]:
+        # Large inputs are sent in several requests, an oversized body times
+        # out or is rejected by the API.
+        return [
+            sentences[i : i + MAX_BATCH_SIZE]
+            for i in range(0, len(sentences), MAX_BATCH_SIZE)
+        ]
+
     def get_embeddings(self, sentences: list[str]) -> List[List[float]]:
         """Get embeddings."""
+        embeddings = []
+        for batch in self._batches(sentences):
+            embeddings.extend(self._get_batch_embeddings(batch))
+        return embeddings
+
+    def _get_batch_embeddings(self, sentences: list[str]) -> List[List[float]]:
         # Prepare request payload #Added by David
         data = {
             "model": self.model,
@@ -75,29 +91,44 @@ class _APICaller:
     async def aget_embeddings(self, sentences: list[str]) -> List[List[float]]:
         """Asynchronously get text embeddings."""
         import aiohttp
-        
+
+        async with aiohttp.ClientSession(
+            headers=self.get_headers(), trust_env=True
+        ) as session:
+            # The batches are requested concurrently, gather keeps their order.
+            results = await asyncio.gather(
+                *[
+                    self._aget_batch_embeddings(session, batch)
+                    for batch in self._batches(sentences)
+                ]
+            )
+        return [embedding for embeddings in results for embedding in embeddings]
+
+    async def _aget_batch_embeddings(
+        self, session: Any, sentences: list[str]
+    ) -> List[List[float]]:
         data = {
             "model": self.model,
             "input": sentences
         }
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            async with session.post(
-                self.api_url,
-                json=data
-                # json={
-                #     "sentences": sentences,
-                #     "model": self.model,
-                # },
-            ) as response:
-                resp = await response.json()
-                response.raise_for_status()
-                # Extract embeddings from the response
-                embeddings = []
-                for item in resp['data']:
-                    embeddings.append(item['embedding'])
-                return embeddings
-                # return resp["embeddings"]
+        async with session.post(
+            self.api_url,
+            json=data
+            # json={
+            #     "sentences": sentences,
+            #     "model": self.model,
+            # },
+        ) as response:
+            # Check the status first, an error body may not be JSON.
+            response.raise_for_status()
+            resp = await response.json()
+            # Extract embeddings from the response
+            embeddings = []
+            for item in resp['data']:
+                embeddings.append(item['embedding'])
+            return embeddings
+            # return resp["embeddings"]
 
 
 class LocalEmbedding(BaseEmbedding):
@@ -0,0 +1,73 @@
+import hashlib
+import logging
+from typing import Any, Optional
+
+import orjson
+import redis
+
+from app.core.config import settings
+from app.rag.knowledge_graph.schema import KnowledgeGraph
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    An exact-match cache of the knowledge graphs extracted from the chunks,
+    stored in Redis, so re-indexing a document whose chunks didn't change
+    doesn't call the LLM again.
+
+    Keys are the SHA-256 of the chunk text and everything the extraction
+    output depends on (LM provider, model and options, compiled program),
+    values are the JSON encoded `KnowledgeGraph`, expiring after `ttl`.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        ttl: int,
+        prefix: str = "sundb:kg_extraction_cache",
+    ):
+        self._redis_url = redis_url
+        self._client: Optional[redis.Redis] = None
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(self._redis_url)
+        return self._client
+
+    def make_key(self, text: str, **params: Any) -> str:
+        payload = orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str)
+        digest = hashlib.sha256(payload + b"\n" + text.encode()).hexdigest()
+        return f"{self.prefix}:{digest}"
+
+    def get(self, key: str) -> Optional[KnowledgeGraph]:
+        try:
+            value = self.client.get(key)
+        except redis.RedisError as e:
+            # The cache must never break indexing.
+            logger.warning(f"Failed to read the extraction cache: {e}")
+            return None
+        if value is None:
+            return None
+        try:
+            return KnowledgeGraph.model_validate_json(value)
+        except ValueError as e:
+            # Written by an older schema, extract again.
+            logger.warning(f"Ignored an invalid extraction cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, knowledge_graph: KnowledgeGraph):
+        try:
+            self.client.set(key, knowledge_graph.model_dump_json(), ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to write the extraction cache: {e}")
+
+
+extraction_cache = ExtractionCache(
+    redis_url=settings.KG_EXTRACTION_CACHE_URL or settings.CELERY_BROKER_URL,
+    ttl=settings.KG_EXTRACTION_CACHE_TTL,
+)
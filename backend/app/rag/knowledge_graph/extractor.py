@@ -7,6 +7,8 @@ from dspy.signatures.field import InputField, OutputField
 from typing import Mapping, Optional, List, Dict, Any
 from llama_index.core.schema import BaseNode
 
+from app.core.config import settings
+from app.rag.knowledge_graph.extraction_cache import extraction_cache
 from app.rag.knowledge_graph.schema import (
     Entity,
     Relationship,
@@ -407,17 +409,18 @@ class SimpleGraphExtractor:
         if compiled_extract_program_path is not None:
             self.extractor.load(compiled_extract_program_path)
             logger.info(f"Loaded compiled extraction program from '{compiled_extract_program_path}'.")
+        # Everything but the text the extraction output depends on.
+        self._cache_params = {
+            "provider": dspy_lm.provider,
+            "lm_options": getattr(dspy_lm, "kwargs", None),
+            "compiled_extract_program_path": compiled_extract_program_path,
+        }
 
     def extract(self, text: str, node: BaseNode) -> (pd.DataFrame, pd.DataFrame):
         """
         Executes the extraction process and returns DataFrames for entities and relationships.
         """
-        try:
-            knowledge_graph = self.extractor.forward(text=text)
-            logger.info("Knowledge graph extraction successful.")
-        except Exception as e:
-            logger.error(f"Extraction failed: {e}")
-            raise e
+        knowledge_graph = self._extract_knowledge_graph(text)
 
         metadata = get_relation_metadata_from_node(node)
         entities_df, relationships_df = self._to_df(
@@ -426,6 +429,26 @@ class SimpleGraphExtractor:
         logger.info("Converted knowledge graph to DataFrames.")
         return entities_df, relationships_df
 
+    def _extract_knowledge_graph(self, text: str) -> KnowledgeGraph:
+        cache_key = None
+        if settings.KG_EXTRACTION_CACHE_ENABLED:
+            cache_key = extraction_cache.make_key(text, **self._cache_params)
+            knowledge_graph = extraction_cache.get(cache_key)
+            if knowledge_graph is not None:
+                logger.info("Reused the cached knowledge graph extraction.")
+                return knowledge_graph
+
+        try:
+            knowledge_graph = self.extractor.forward(text=text)
+            logger.info("Knowledge graph extraction successful.")
+        except Exception as e:
+            logger.error(f"Extraction failed: {e}")
+            raise e
+
+        if cache_key is not None:
+            extraction_cache.set(cache_key, knowledge_graph)
+        return knowledge_graph
+
     def _to_df(
         self,
         entities: List[Entity],
@@ -83,10 +83,23 @@ def get_text_embedding(text: str, embed_model: BaseEmbedding = None) -> Embeddin
     return embed_model.get_text_embedding(text)
 
 
+def get_text_embeddings(
+    texts: List[str], embed_model: BaseEmbedding = None
+) -> List[Embedding]:
+    # One request per `embed_batch_size` texts instead of one per text.
+    if not embed_model:
+        embed_model = get_default_embed_model()
+    return embed_model.get_text_embedding_batch(texts)
+
+
+def get_entity_description_text(name: str, description: str) -> str:
+    return f"{name}: {description}"
+
+
 def get_entity_description_embedding(
     name: str, description: str, embed_model: BaseEmbedding = None
 ) -> Embedding:
-    combined_text = f"{name}: {description}"
+    combined_text = get_entity_description_text(name, description)
     return get_text_embedding(combined_text, embed_model)
 
 
@@ -105,8 +118,24 @@ def get_relationship_description_embedding(
     relationship_desc: str,
     embed_model: BaseEmbedding = None,
 ):
-    combined_text = (
+    combined_text = get_relationship_description_text(
+        source_entity_name,
+        source_entity_description,
+        target_entity_name,
+        target_entity_description,
+        relationship_desc,
+    )
+    return get_text_embedding(combined_text, embed_model)
+
+
+def get_relationship_description_text(
+    source_entity_name: str,
+    source_entity_description,
+    target_entity_name: str,
+    target_entity_description: str,
+    relationship_desc: str,
+) -> str:
+    return (
         f"{source_entity_name}({source_entity_description}) -> "
         f"{relationship_desc} -> {target_entity_name}({target_entity_description}) "
     )
-    return get_text_embedding(combined_text, embed_model)
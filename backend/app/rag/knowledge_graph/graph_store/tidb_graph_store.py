@@ -31,13 +31,15 @@ from app.rag.knowledge_graph.graph_store.helpers import (
     DEFAULT_DEGREE_COEFFICIENT,
     get_query_embedding,
     get_entity_description_embedding,
+    get_entity_description_text,
     get_entity_metadata_embedding,
     get_relationship_description_embedding,
+    get_relationship_description_text,
+    get_text_embeddings,
 )
 from pgvector.sqlalchemy import Vector
 #new changes below
-from sqlalchemy import func, cast, Float
-from sqlalchemy.dialects.postgresql import array as pg_array
+from sqlalchemy import func, cast
 from sqlalchemy.dialects.postgresql import JSONB
 
 logger = logging.getLogger(__name__)
@@ -205,15 +207,37 @@ class TiDBGraphStore(KnowledgeGraphStore):
 
         if (
             self._session.scalars(
-                select(DBRelationship).where(
-                    cast(DBRelationship.meta["chunk_id"], String) == str(chunk_id)
-                )
+                select(DBRelationship.id)
+                .where(cast(DBRelationship.meta["chunk_id"], String) == str(chunk_id))
+                .limit(1)
             ).first()
             is not None
         ):
             logger.info(f"{chunk_id} already exists in the relationship table, skip.")
             return
 
+        # Embed the entity and relationship descriptions in batches up front
+        # instead of one embedding request per entity / relationship.
+        entity_texts = {
+            get_entity_description_text(row["name"], row["description"])
+            for _, row in entities_df.iterrows()
+        }
+        for _, row in relationships_df.iterrows():
+            entity_texts.add(
+                get_entity_description_text(
+                    row["source_entity"], row["source_entity_description"]
+                )
+            )
+            entity_texts.add(
+                get_entity_description_text(
+                    row["target_entity"], row["target_entity_description"]
+                )
+            )
+        entity_texts = list(entity_texts)
+        entity_vecs = dict(
+            zip(entity_texts, get_text_embeddings(entity_texts, self._embed_model))
+        )
+
         entities_name_map = defaultdict(list)
         for _, row in entities_df.iterrows():
             entities_name_map[row["name"]].append(
@@ -223,15 +247,16 @@ class TiDBGraphStore(KnowledgeGraphStore):
                         description=row["description"],
                         metadata=row["meta"],
                     ),
+                    description_vec=entity_vecs[
+                        get_entity_description_text(row["name"], row["description"])
+                    ],
                 )
             )
 
         def _find_or_create_entity_for_relation(
             name: str, description: str
         ) -> DBEntity:
-            _embedding = get_entity_description_embedding(
-                name, description, self._embed_model
-            )
+            _embedding = entity_vecs[get_entity_description_text(name, description)]
             # Check entities_name_map first, if not found, then check the database
             for e in entities_name_map.get(name, []):
                 if (
@@ -245,8 +270,10 @@ class TiDBGraphStore(KnowledgeGraphStore):
                     description=description,
                     metadata={"status": "need-revised"},
                 ),
+                description_vec=_embedding,
             )
 
+        relationships = []
         for _, row in relationships_df.iterrows():
             source_entity = _find_or_create_entity_for_relation(
                 row["source_entity"], row["source_entity_description"]
@@ -254,7 +281,24 @@ class TiDBGraphStore(KnowledgeGraphStore):
             target_entity = _find_or_create_entity_for_relation(
                 row["target_entity"], row["target_entity_description"]
             )
-
+            relationships.append((source_entity, target_entity, row))
+
+        relationship_vecs = get_text_embeddings(
+            [
+                get_relationship_description_text(
+                    source_entity.name,
+                    source_entity.description,
+                    target_entity.name,
+                    target_entity.description,
+                    row["relationship_desc"],
+                )
+                for source_entity, target_entity, row in relationships
+            ],
+            self._embed_model,
+        )
+        for (source_entity, target_entity, row), description_vec in zip(
+            relationships, relationship_vecs
+        ):
             self.create_relationship(
                 source_entity,
                 target_entity,
@@ -265,6 +309,7 @@ class TiDBGraphStore(KnowledgeGraphStore):
                 ),
                 relationship_meatadata=row["meta"],
                 commit=False,
+                description_vec=description_vec,
             )
         self._session.commit()
 
@@ -275,19 +320,22 @@ class TiDBGraphStore(KnowledgeGraphStore):
         relationship: Relationship,
         relationship_meatadata: dict = {},
         commit=True,
+        description_vec: Optional[List[float]] = None,
     ) -> DBRelationship:
-        relationshipObject = DBRelationship(
-            source_entity=source_entity,
-            target_entity=target_entity,
-            description=relationship.relationship_desc,
-            description_vec=get_relationship_description_embedding(
+        if description_vec is None:
+            description_vec = get_relationship_description_embedding(
                 source_entity.name,
                 source_entity.description,
                 target_entity.name,
                 target_entity.description,
                 relationship.relationship_desc,
                 self._embed_model,
-            ),
+            )
+        relationshipObject = DBRelationship(
+            source_entity=source_entity,
+            target_entity=target_entity,
+            description=relationship.relationship_desc,
+            description_vec=description_vec,
             meta=relationship_meatadata,
             document_id=relationship_meatadata.get("document_id"),
             chunk_id=relationship_meatadata.get("chunk_id"),
@@ -296,7 +344,9 @@ class TiDBGraphStore(KnowledgeGraphStore):
         if commit:
             self._session.commit()
 
-    def get_or_create_entity(self, entity: Entity) -> DBEntity:
+    def get_or_create_entity(
+        self, entity: Entity, description_vec: Optional[List[float]] = None
+    ) -> DBEntity:
         # using the cosine distance between the description vectors to determine if the entity already exists
         entity_type = (
             EntityType.synopsis
@@ -304,16 +354,17 @@ class TiDBGraphStore(KnowledgeGraphStore):
             else EntityType.original
         )
         
-        entity_description_vec = get_entity_description_embedding(
-            entity.name,
-            entity.description,
-            self._embed_model,
-        )
+        entity_description_vec = description_vec
+        if entity_description_vec is None:
+            entity_description_vec = get_entity_description_embedding(
+                entity.name,
+                entity.description,
+                self._embed_model,
+            )
 
         # Build the distance expression
-        distance_expr = func.cosine_distance(
-            DBEntity.description_vec,
-            func.array_to_vector(pg_array(entity_description_vec, type_=Float))
+        distance_expr = DBEntity.description_vec.cosine_distance(
+            entity_description_vec
         ).label("distance")
 
 
@@ -759,10 +810,10 @@ class TiDBGraphStore(KnowledgeGraphStore):
         
         embedding_vector = embedding 
 
-        # Build the distance expression using the array_to_vector function
-        distance_expr = func.cosine_distance(
-        DBRelationship.description_vec,
-        func.array_to_vector(pg_array(embedding_vector, type_=Float))
+        # Bind the embedding through the column type so it matches the column's
+        # vector/halfvec storage
+        distance_expr = DBRelationship.description_vec.cosine_distance(
+            embedding_vector
         ).label("embedding_distance")
 
         # Continue with the rest of your code, replacing the previous distance expression | # select the relationships to rank
@@ -929,10 +980,10 @@ class TiDBGraphStore(KnowledgeGraphStore):
     ):
         new_entity_set = set()
 
-        # Build the distance expression using the array_to_vector function
-        distance_expr = func.cosine_distance(
-        DBEntity.description_vec,
-        func.array_to_vector(pg_array(embedding, type_=Float))
+        # Bind the embedding through the column type so it matches the column's
+        # vector/halfvec storage
+        distance_expr = DBEntity.description_vec.cosine_distance(
+            embedding
         ).label("embedding_distance")
 
 
@@ -1,22 +1,72 @@
 import logging
+import threading
 from typing import List, Optional
+
+from cachetools import TTLCache
 from llama_index.core import VectorStoreIndex
-from llama_index.core.schema import NodeWithScore
+from llama_index.core.schema import NodeWithScore, QueryBundle
 from sqlmodel import Session, select
 
+from app.core.config import settings
 from app.models import (
     Document,
     Chunk,
 )
 from app.rag.chat import get_prompt_by_jinja2_template
-from app.rag.chat_config import ChatEngineConfig, get_default_embedding_model
+from app.rag.chat_config import (
+    ChatEngineConfig,
+    get_default_embedding_model,
+    register_chat_engine_invalidation_callback,
+)
 from app.rag.knowledge_graph import KnowledgeGraphIndex
 from app.rag.knowledge_graph.graph_store import TiDBGraphStore
 from app.rag.vector_store.tidb_vector_store import TiDBVectorStore
+from app.rag.semantic_cache import retrieve_cache
+from app.rag.embedding_cache import embed_query_with_cache
 
 logger = logging.getLogger(__name__)
 
 
+class RetrieveEngine:
+    """
+    The session independent part of RetrieveService: the chat engine config
+    and the model clients built from it, shared by all requests to the same
+    chat engine.
+    """
+
+    def __init__(self, db_session: Session, engine_name: str):
+        self.engine_name = engine_name
+        self.chat_engine_config = ChatEngineConfig.load_from_db(db_session, engine_name)
+        self.db_chat_engine = self.chat_engine_config.get_db_chat_engine()
+        self.reranker = self.chat_engine_config.get_reranker(db_session)
+        self.fast_llm = self.chat_engine_config.get_fast_llama_llm(db_session)
+        self.fast_dspy_lm = self.chat_engine_config.get_fast_dspy_lm(db_session)
+
+
+# Expire together with the chat engine configs they are built from.
+_retrieve_engines: TTLCache = TTLCache(maxsize=32, ttl=60)
+_retrieve_engines_lock = threading.Lock()
+
+
+def _clear_retrieve_engines():
+    with _retrieve_engines_lock:
+        _retrieve_engines.clear()
+
+
+register_chat_engine_invalidation_callback(_clear_retrieve_engines)
+
+
+def get_retrieve_engine(db_session: Session, engine_name: str) -> RetrieveEngine:
+    cache_key = engine_name or "default"
+    with _retrieve_engines_lock:
+        retrieve_engine = _retrieve_engines.get(cache_key)
+    if retrieve_engine is None:
+        retrieve_engine = RetrieveEngine(db_session, engine_name)
+        with _retrieve_engines_lock:
+            _retrieve_engines[cache_key] = retrieve_engine
+    return retrieve_engine
+
+
 class RetrieveService:
     def __init__(
         self,
@@ -26,9 +76,12 @@ class RetrieveService:
         self.db_session = db_session
         self.engine_name = engine_name
 
-        self.chat_engine_config = ChatEngineConfig.load_from_db(db_session, engine_name)
-        self.db_chat_engine = self.chat_engine_config.get_db_chat_engine()
-        self._reranker = self.chat_engine_config.get_reranker(db_session)
+        retrieve_engine = get_retrieve_engine(db_session, engine_name)
+        self.chat_engine_config = retrieve_engine.chat_engine_config
+        self.db_chat_engine = retrieve_engine.db_chat_engine
+        self._reranker = retrieve_engine.reranker
+        self._fast_llm = retrieve_engine.fast_llm
+        self._fast_dspy_lm = retrieve_engine.fast_dspy_lm
 
     def retrieve(self, question: str, top_k: int = 10) -> List[Document]:
         """
@@ -42,15 +95,38 @@ class RetrieveService:
             A list of related documents.
         """
         try:
-            return self._retrieve(question, top_k)
+            return self._cached(
+                "documents",
+                question,
+                top_k,
+                lambda embedding: self._retrieve(question, top_k, embedding),
+            )
         except Exception as e:
             logger.exception(e)
 
-    def _retrieve(self, question: str, top_k: int) -> List[Document]:
+    def _cached(self, kind: str, question: str, top_k: int, retrieve_fn):
+        """
+        Serve the results of semantically near questions from the retrieve
+        cache, `retrieve_fn` receives the question embedding on a miss.
+        """
         _embed_model = get_default_embedding_model(self.db_session)
-        _llm = self.chat_engine_config.get_llama_llm(self.db_session)
-        _fast_llm = self.chat_engine_config.get_fast_llama_llm(self.db_session)
-        _fast_dspy_lm = self.chat_engine_config.get_fast_dspy_lm(self.db_session)
+        embedding = embed_query_with_cache(_embed_model, question)
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return retrieve_fn(embedding)
+
+        namespace = f"{self.engine_name}:{kind}:{top_k}"
+        results = retrieve_cache.get(namespace, embedding)
+        if results is None:
+            results = retrieve_fn(embedding)
+            retrieve_cache.set(namespace, embedding, results)
+        return results
+
+    def _retrieve(
+        self, question: str, top_k: int, embedding: Optional[List[float]] = None
+    ) -> List[Document]:
+        _embed_model = get_default_embedding_model(self.db_session)
+        _fast_llm = self._fast_llm
+        _fast_dspy_lm = self._fast_dspy_lm
 
         # 1. Retrieve entities, relations, and chunks from the knowledge graph
         kg_config = self.chat_engine_config.knowledge_graph
@@ -77,9 +153,10 @@ class RetrieveService:
                 )
                 graph_knowledges_context = graph_knowledges.template
             else:
+                # Reuse the embedding computed for the cache lookup.
                 entities, relations, chunks = graph_index.retrieve_with_weight(
                     question,
-                    [],
+                    embedding or [],
                     depth=kg_config.depth,
                     include_meta=kg_config.include_meta,
                     with_degree=kg_config.with_degree,
@@ -135,6 +212,16 @@ class RetrieveService:
         return source_documents
 
     def _embedding_retrieve(self, question: str, top_k: int) -> List[NodeWithScore]:
+        return self._cached(
+            "nodes",
+            question,
+            top_k,
+            lambda embedding: self._embedding_retrieve_nodes(question, top_k, embedding),
+        )
+
+    def _embedding_retrieve_nodes(
+        self, question: str, top_k: int, embedding: Optional[List[float]] = None
+    ) -> List[NodeWithScore]:
         _embed_model = get_default_embedding_model(self.db_session)
 
         vector_store = TiDBVectorStore(session=self.db_session)
@@ -148,7 +235,10 @@ class RetrieveService:
             similarity_top_k=top_k,
         )
 
-        node_list: List[NodeWithScore] = retrieve_engine.retrieve(question)
+        # Reuse the embedding computed for the cache lookup.
+        node_list: List[NodeWithScore] = retrieve_engine.retrieve(
+            QueryBundle(query_str=question, embedding=embedding)
+        )
         return node_list
 
     def _get_source_documents(self, node_list: List[NodeWithScore]) -> List[Document]:
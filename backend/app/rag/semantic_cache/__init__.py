@@ -1,3 +1,4 @@
 from .base import SemanticCacheManager, SemanticItem
+from .retrieve_cache import RetrieveCache, retrieve_cache
 
-__all__ = ["SemanticCacheManager", "SemanticItem"]
+__all__ = ["SemanticCacheManager", "SemanticItem", "RetrieveCache", "retrieve_cache"]
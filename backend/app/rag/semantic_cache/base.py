@@ -4,12 +4,13 @@ import logging
 from dspy.predict import ChainOfThought
 from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
-from sqlmodel import Session, select, func
+from sqlmodel import Session, select, func, text
 
 from llama_index.core.embeddings.utils import EmbedType, resolve_embed_model
 from llama_index.embeddings.openai import OpenAIEmbedding, OpenAIEmbeddingModelType
 
 from app.models import SemanticCache
+from app.rag.embedding_cache import embed_query_with_cache
 
 logger = logging.getLogger(__name__)
 
@@ -108,7 +109,7 @@ class SemanticCacheManager:
             self.prog.load(complied_sc_search_program_path)
 
     def get_query_embedding(self, query: str):
-        return self._embed_model.get_query_embedding(query)
+        return embed_query_with_cache(self._embed_model, query)
 
     def add_cache(
         self,
@@ -125,7 +126,6 @@ class SemanticCacheManager:
             query=item.question,
             query_vec=self.get_query_embedding(item.question),
             value=item.answer,
-            value_vec=self.get_query_embedding(item.answer),
             meta=metadata,
         )
         session.add(object)
@@ -146,6 +146,9 @@ class SemanticCacheManager:
                 SemanticCache,
                 SemanticCache.query_vec.cosine_distance(embedding).label("distance"),
             )
+            # Lets the planner prune the partitions which are past the TTL
+            # but haven't been dropped yet.
+            .where(SemanticCache.created_at >= func.now() - text("INTERVAL '1 month'"))
             .having(SemanticCache.query_vec.cosine_distance(embedding) < 0.5)
             .order_by("distance")
             .limit(20)
@@ -0,0 +1,109 @@
+import pickle
+import logging
+from datetime import timedelta
+from typing import Any, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select, delete, func
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import RetrieveCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class RetrieveCache:
+    """
+    A semantic cache for retrieval results, stored in the `retrieve_cache`
+    table.
+
+    A lookup returns the cached value of the most similar query in the
+    namespace if its cosine similarity reaches the threshold, the search runs
+    in PostgreSQL. Entries expire after `ttl` seconds, and every namespace
+    keeps at most `max_entries` entries, the oldest ones are evicted first.
+
+    The results are computed from the indexed documents and the chat engine
+    config, `clear` must be called whenever either changes.
+    """
+
+    def __init__(self, ttl: int, threshold: float, max_entries: int):
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+    def _not_expired(self):
+        return RetrieveCacheEntry.created_at >= func.now() - timedelta(seconds=self.ttl)
+
+    def get(self, namespace: str, embedding: List[float]) -> Optional[Any]:
+        try:
+            with Session(engine) as session:
+                distance = RetrieveCacheEntry.query_vec.cosine_distance(embedding)
+                nearest = session.exec(
+                    select(RetrieveCacheEntry.value, distance.label("distance"))
+                    .where(RetrieveCacheEntry.namespace == namespace, self._not_expired())
+                    .order_by(distance)
+                    .limit(1)
+                ).first()
+        except SQLAlchemyError as e:
+            # The cache must never break retrieval.
+            logger.warning(f"Failed to read the retrieve cache: {e}")
+            return None
+        if nearest is None or 1 - nearest.distance < self.threshold:
+            return None
+        return pickle.loads(nearest.value)
+
+    def set(self, namespace: str, embedding: List[float], value: Any):
+        try:
+            with Session(engine) as session:
+                session.add(
+                    RetrieveCacheEntry(
+                        namespace=namespace,
+                        query_vec=embedding,
+                        value=pickle.dumps(value),
+                    )
+                )
+                # Ids grow with time, keep the newest unexpired entries.
+                kept = (
+                    select(RetrieveCacheEntry.id)
+                    .where(RetrieveCacheEntry.namespace == namespace, self._not_expired())
+                    .order_by(RetrieveCacheEntry.id.desc())
+                    .limit(self.max_entries)
+                )
+                session.flush()
+                session.exec(
+                    delete(RetrieveCacheEntry).where(
+                        RetrieveCacheEntry.namespace == namespace,
+                        RetrieveCacheEntry.id.not_in(kept),
+                    )
+                )
+                session.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Failed to write the retrieve cache: {e}")
+
+    def delete_expired(self) -> int:
+        # Namespaces no longer written to are only evicted from here.
+        with Session(engine) as session:
+            deleted = session.exec(
+                delete(RetrieveCacheEntry).where(
+                    RetrieveCacheEntry.created_at
+                    < func.now() - timedelta(seconds=self.ttl)
+                )
+            ).rowcount
+            session.commit()
+        return deleted
+
+    def clear(self):
+        try:
+            with Session(engine) as session:
+                session.exec(delete(RetrieveCacheEntry))
+                session.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Failed to clear the retrieve cache: {e}")
+
+
+retrieve_cache = RetrieveCache(
+    ttl=settings.SEMANTIC_CACHE_TTL,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+)
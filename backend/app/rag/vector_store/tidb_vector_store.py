@@ -1,3 +1,5 @@
+import io
+import json
 import logging
 from typing import Any, List, Optional
 
@@ -14,8 +16,9 @@ from llama_index.core.vector_stores.utils import (
 )
 from sqlmodel import Session, delete, select, asc
 
+from app.core.config import settings
 from app.core.db import engine
-from app.models import Chunk as DBChunk
+from app.models import Chunk as DBChunk, KgIndexStatus
 
 _logger = logging.getLogger(__name__)
 
@@ -32,6 +35,39 @@ def node_to_relation_dict(node: BaseNode) -> dict:
     return relations
 
 
+# Columns written by `COPY`, the created_at / updated_at server defaults apply.
+COPY_CHUNK_COLUMNS = (
+    "id",
+    "hash",
+    "text",
+    "meta",
+    "embedding",
+    "document_id",
+    "relations",
+    "source_uri",
+    "index_status",
+)
+
+
+def copy_text_value(value: Any) -> str:
+    """Encode a value as a field of PostgreSQL's COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_vector_value(embedding: List[float]) -> str:
+    return "[" + ",".join(str(float(v)) for v in embedding) + "]"
+
+
 class TiDBVectorStore(BasePydanticVectorStore):
     _session: Session = PrivateAttr()
     _owns_session: bool = PrivateAttr()
@@ -86,10 +122,38 @@ class TiDBVectorStore(BasePydanticVectorStore):
                 }
             )
 
-        self._session.bulk_insert_mappings(DBChunk, items)
+        self._copy_chunks(items)
         self._session.commit()
         return [i["id"] for i in items]
 
+    def _copy_chunks(self, items: List[dict]) -> None:
+        # COPY streams the rows in one statement per batch, much cheaper than
+        # an INSERT (and its parameter binding) per chunk for large documents.
+        # It runs on the session's connection, so it's part of its transaction.
+        cursor = self._session.connection().connection.cursor()
+        copy_sql = (
+            f"COPY {DBChunk.__tablename__} ({', '.join(COPY_CHUNK_COLUMNS)}) "
+            "FROM STDIN"
+        )
+        try:
+            batch_size = settings.CHUNK_COPY_BATCH_SIZE
+            for start in range(0, len(items), batch_size):
+                buf = io.StringIO()
+                for item in items[start : start + batch_size]:
+                    row = {
+                        **item,
+                        "embedding": copy_vector_value(item["embedding"]),
+                        "index_status": KgIndexStatus.NOT_STARTED.name,
+                    }
+                    buf.write(
+                        "\t".join(copy_text_value(row[c]) for c in COPY_CHUNK_COLUMNS)
+                    )
+                    buf.write("\n")
+                buf.seek(0)
+                cursor.copy_expert(copy_sql, buf)
+        finally:
+            cursor.close()
+
     def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
         """
         Delete all nodes of a document from the vector store.
@@ -134,7 +198,7 @@ class TiDBVectorStore(BasePydanticVectorStore):
 
         if query.filters:
             for f in query.filters.filters:
-                stmt = stmt.where(DBChunk.meta[f.key] == f.value)
+                stmt = stmt.where(DBChunk.meta.contains({f.key: f.value}))
 
         stmt = stmt.order_by(asc("distance")).limit(query.similarity_top_k)
         results = self._session.execute(stmt)
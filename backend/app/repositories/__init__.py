@@ -3,4 +3,6 @@ from .staff_action_log import staff_action_repo
 from .chat_engine import chat_engine_repo
 from .chat import chat_repo
 from .document import document_repo
+from .chunk import chunk_repo
 from .data_source import data_source_repo
+from .semantic_cache import semantic_cache_repo
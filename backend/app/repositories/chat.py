@@ -66,6 +66,7 @@ class ChatRepo(BaseRepo):
             select(ChatMessage)
             .where(ChatMessage.chat_id == chat.id)
             .order_by(ChatMessage.ordinal.desc())
+            .limit(1)
         ).first()
 
     def get_messages(
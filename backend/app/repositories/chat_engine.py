@@ -3,6 +3,7 @@ from datetime import datetime, UTC
 from sqlmodel import select, Session, update
 from fastapi_pagination import Params, Page
 from fastapi_pagination.ext.sqlmodel import paginate
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.attributes import flag_modified
 
 from app.models import ChatEngine, ChatEngineUpdate
@@ -12,9 +13,20 @@ from app.repositories.base_repo import BaseRepo
 class ChatEngineRepo(BaseRepo):
     model_cls = ChatEngine
 
+    def _select_with_models(self):
+        # ChatEngineConfig reads all three models right after loading the
+        # engine, load them in the same query instead of one SELECT each.
+        return select(ChatEngine).options(
+            joinedload(ChatEngine.llm),
+            joinedload(ChatEngine.fast_llm),
+            joinedload(ChatEngine.reranker),
+        )
+
     def get(self, session: Session, id: int) -> Optional[ChatEngine]:
         return session.scalars(
-            select(ChatEngine).where(ChatEngine.id == id, ChatEngine.deleted_at.is_(None))
+            self._select_with_models().where(
+                ChatEngine.id == id, ChatEngine.deleted_at.is_(None)
+            )
         ).first()
 
     def paginate(
@@ -29,15 +41,15 @@ class ChatEngineRepo(BaseRepo):
 
     def get_default_engine(self, session: Session) -> Optional[ChatEngine]:
             result = session.scalars(
-                select(ChatEngine).where(
+                self._select_with_models().where(
                     ChatEngine.is_default == True, ChatEngine.deleted_at.is_(None)
                 )
             )
             return result.first()
 
     def get_engine_by_name(self, session: Session, name: str) -> Optional[ChatEngine]:
-        return session.execute(
-            select(ChatEngine).where(
+        return session.scalars(
+            self._select_with_models().where(
                 ChatEngine.name == name, ChatEngine.deleted_at.is_(None)
             )
         ).first()
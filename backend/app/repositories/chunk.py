@@ -0,0 +1,54 @@
+from sqlmodel import select, Session
+from fastapi_pagination import Params, Page
+from fastapi_pagination.ext.sqlmodel import paginate
+
+from app.models import Chunk
+from app.repositories.base_repo import BaseRepo
+from app.schemas import ChunkItem
+
+
+class ChunkRepo(BaseRepo):
+    model_cls = Chunk
+
+    def paginate_document_chunks(
+        self,
+        session: Session,
+        document_id: int,
+        params: Params | None = Params(),
+    ) -> Page[ChunkItem]:
+        # The embeddings are not selected, they are the bulk of a chunk row.
+        query = (
+            select(
+                Chunk.id,
+                Chunk.document_id,
+                Chunk.hash,
+                Chunk.text,
+                Chunk.meta,
+                Chunk.source_uri,
+                Chunk.index_status,
+                Chunk.index_result,
+            )
+            .where(Chunk.document_id == document_id)
+            .order_by(Chunk.id)
+        )
+        return paginate(
+            session,
+            query,
+            params,
+            transformer=lambda items: [
+                ChunkItem(
+                    id=item[0],
+                    document_id=item[1],
+                    hash=item[2],
+                    text=item[3],
+                    meta=item[4],
+                    source_uri=item[5],
+                    index_status=item[6],
+                    index_result=item[7],
+                )
+                for item in items
+            ],
+        )
+
+
+chunk_repo = ChunkRepo()
@@ -2,6 +2,7 @@ from typing import Optional
 from datetime import datetime, UTC
 
 from sqlmodel import select, Session, func, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi_pagination import Params, Page
 from fastapi_pagination.ext.sqlmodel import paginate
 
@@ -20,17 +21,26 @@ from app.schemas import VectorIndexError, KGIndexError
 class DataSourceRepo(BaseRepo):
     model_cls = DataSource
 
+    def _paginate_query(self):
+        return (
+            select(DataSource)
+            .where(DataSource.deleted_at == None)
+            .order_by(DataSource.created_at.desc())
+        )
+
     def paginate(
         self,
         session: Session,
         params: Params | None = Params(),
     ) -> Page[DataSource]:
-        query = (
-            select(DataSource)
-            .where(DataSource.deleted_at == None)
-            .order_by(DataSource.created_at.desc())
-        )
-        return paginate(session, query, params)
+        return paginate(session, self._paginate_query(), params)
+
+    async def paginate_async(
+        self,
+        session: AsyncSession,
+        params: Params | None = Params(),
+    ) -> Page[DataSource]:
+        return await paginate(session, self._paginate_query(), params)
 
     # def get(
     #     self,
@@ -54,6 +64,17 @@ class DataSourceRepo(BaseRepo):
         )
         return result.scalar_one_or_none()
 
+    async def get_async(
+        self,
+        session: AsyncSession,
+        data_source_id: int,
+    ) -> Optional[DataSource]:
+        result = await session.exec(
+            select(DataSource).where(
+                DataSource.id == data_source_id, DataSource.deleted_at == None
+            )
+        )
+        return result.first()
 
     def delete(self, session: Session, data_source: DataSource) -> None:
         data_source.deleted_at = datetime.now(UTC)
@@ -187,70 +208,44 @@ class DataSourceRepo(BaseRepo):
     def set_failed_vector_index_tasks_to_pending(
         self, session: Session, data_source: DataSource
     ) -> list[int]:
-        result = session.execute(
-        select(Document.id).where(
-            Document.data_source_id == data_source.id,
-            Document.index_status == DocIndexTaskStatus.FAILED,
-        )
-    )
-        failed_document_ids = result.scalars().all()
-        if not failed_document_ids:
-            # No failed documents to update
-            return []
-        # failed_document_ids = session.execute(
-        #     select(Document.id).where(
-        #         Document.data_source_id == data_source.id,
-        #         Document.index_status == DocIndexTaskStatus.FAILED,
-        #     )
-        # ).all()
+        # A single UPDATE ... RETURNING: one round-trip, and the returned ids
+        # are exactly the rows this statement flipped.
         stmt = (
             update(Document)
             .where(
-                Document.id.in_(failed_document_ids),
+                Document.data_source_id == data_source.id,
                 Document.index_status == DocIndexTaskStatus.FAILED,
             )
             .values(index_status=DocIndexTaskStatus.PENDING)
+            .returning(Document.id)
+            .execution_options(synchronize_session=False)
         )
-        session.execute(stmt)
+        failed_document_ids = session.execute(stmt).scalars().all()
         session.commit()
-        return failed_document_ids
+        return list(failed_document_ids)
 
     def set_failed_kg_index_tasks_to_pending(
         self, session: Session, data_source: DataSource
-    ) -> list[tuple]:
-        # failed_chunks = session.execute(
-        #     select(
-        #         Chunk.id,
-        #         Chunk.document_id,
-        #     ).where(
-        #         Chunk.document.has(Document.data_source_id == data_source.id),
-        #         Chunk.index_status == KgIndexStatus.FAILED,
-        #     )
-        # ).all()
-
-        result = session.execute(
-            select(
-                Chunk.id,
-                Chunk.document_id,
-            ).where(
-                Chunk.document.has(Document.data_source_id == data_source.id),
-                Chunk.index_status == KgIndexStatus.FAILED,
-            )
-        )
-        failed_chunks = result.all()
-        if not failed_chunks:
-            return []
-        failed_chunk_ids = [chunk_id for chunk_id, _ in failed_chunks]
-
-        # failed_chunks_ids = [chunk[0] for chunk in failed_chunks]
+    ) -> list[int]:
+        # Only the documents are returned, the workers look up their pending
+        # chunks themselves instead of every chunk id going through the broker.
         stmt = (
             update(Chunk)
-            .where(Chunk.id.in_(failed_chunk_ids))
+            .where(
+                Chunk.document_id.in_(
+                    select(Document.id).where(
+                        Document.data_source_id == data_source.id
+                    )
+                ),
+                Chunk.index_status == KgIndexStatus.FAILED,
+            )
             .values(index_status=KgIndexStatus.PENDING)
+            .returning(Chunk.document_id)
+            .execution_options(synchronize_session=False)
         )
-        session.execute(stmt)
+        document_ids = session.execute(stmt).scalars().all()
         session.commit()
-        return failed_chunks
+        return list(dict.fromkeys(document_ids))
 
 
 data_source_repo = DataSourceRepo()
@@ -0,0 +1,101 @@
+from datetime import date, datetime, UTC
+
+from sqlmodel import Session, text
+
+from app.models import SemanticCache
+from app.repositories.base_repo import BaseRepo
+
+
+def month_start(d: date, offset: int = 0) -> date:
+    month = d.year * 12 + d.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+class SemanticCacheRepo(BaseRepo):
+    model_cls = SemanticCache
+    # Entries older than this many whole months are dropped with their partition.
+    ttl_months = 1
+
+    def partition_name(self, month: date) -> str:
+        return f"semantic_cache_{month:%Y_%m}"
+
+    def create_partition(self, session: Session, month: date) -> str:
+        start = month_start(month)
+        end = month_start(start, 1)
+        name = self.partition_name(start)
+        if session.execute(text(f"SELECT to_regclass('{name}')")).scalar() is not None:
+            return name
+
+        in_range = f"created_at >= '{start}' AND created_at < '{end}'"
+        # Entries written while the partition didn't exist yet (e.g. the
+        # maintenance task was down) are in the default partition, and
+        # PostgreSQL refuses to create a partition conflicting with them.
+        # The default partition is detached while they are moved over,
+        # which locks the table, so only when there is anything to move.
+        has_default_rows = session.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM semantic_cache_default WHERE {in_range})")
+        ).scalar()
+        if has_default_rows:
+            session.execute(
+                text("ALTER TABLE semantic_cache DETACH PARTITION semantic_cache_default")
+            )
+        # Indexes defined on the parent table, including the HNSW ones, are
+        # created on the new partition automatically.
+        session.execute(
+            text(
+                f"CREATE TABLE {name} PARTITION OF semantic_cache "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        )
+        if has_default_rows:
+            session.execute(
+                text(
+                    "WITH moved AS ("
+                    f"DELETE FROM semantic_cache_default WHERE {in_range} RETURNING *"
+                    f") INSERT INTO {name} SELECT * FROM moved"
+                )
+            )
+            session.execute(
+                text(
+                    "ALTER TABLE semantic_cache "
+                    "ATTACH PARTITION semantic_cache_default DEFAULT"
+                )
+            )
+        return name
+
+    def create_upcoming_partitions(self, session: Session, months: int = 2) -> list[str]:
+        today = datetime.now(UTC).date()
+        names = [
+            self.create_partition(session, month_start(today, i)) for i in range(months)
+        ]
+        session.commit()
+        return names
+
+    def drop_expired_partitions(self, session: Session) -> list[str]:
+        cutoff_month = month_start(datetime.now(UTC).date(), -self.ttl_months)
+        cutoff = self.partition_name(cutoff_month)
+        partitions = session.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'semantic_cache'::regclass"
+            )
+        ).scalars()
+        # Partition names sort chronologically, the default partition is skipped.
+        expired = [
+            name
+            for name in partitions
+            if name != "semantic_cache_default" and name < cutoff
+        ]
+        for name in expired:
+            session.execute(text(f"ALTER TABLE semantic_cache DETACH PARTITION {name}"))
+            session.execute(text(f"DROP TABLE {name}"))
+        # The default partition is never dropped, its expired entries are.
+        session.execute(
+            text(f"DELETE FROM semantic_cache_default WHERE created_at < '{cutoff_month}'")
+        )
+        session.commit()
+        return expired
+
+
+semantic_cache_repo = SemanticCacheRepo()
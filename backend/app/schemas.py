@@ -13,3 +13,14 @@ class KGIndexError(BaseModel):
     chunk_id: UUID
     source_uri: str
     error: str | None = None
+
+
+class ChunkItem(BaseModel):
+    id: UUID
+    document_id: int
+    hash: str
+    text: str
+    meta: dict | list
+    source_uri: str | None = None
+    index_status: str
+    index_result: str | None = None
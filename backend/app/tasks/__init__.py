@@ -1,15 +1,29 @@
 from .rag_build import (
     build_vector_index_from_document,
     build_kg_index_from_chunk,
+    build_vector_index_from_documents,
+    build_kg_index_from_chunks,
+    build_kg_index_from_document,
+    dispatch_vector_index_from_documents,
+    dispatch_kg_index_from_chunks,
+    dispatch_kg_index_from_documents,
 )
 from .datasource import (
     import_documents_from_datasource,
     purge_datasource_related_resources,
 )
+from .semantic_cache import maintain_semantic_cache_partitions
 
 __all__ = [
     "build_vector_index_from_document",
     "build_kg_index_from_chunk",
+    "build_vector_index_from_documents",
+    "build_kg_index_from_chunks",
+    "build_kg_index_from_document",
+    "dispatch_vector_index_from_documents",
+    "dispatch_kg_index_from_chunks",
+    "dispatch_kg_index_from_documents",
     "import_documents_from_datasource",
     "purge_datasource_related_resources",
+    "maintain_semantic_cache_partitions",
 ]
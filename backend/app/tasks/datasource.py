@@ -1,7 +1,11 @@
+from itertools import islice
+
+from sqlalchemy import insert
 from sqlmodel import Session, select, delete
 from celery.utils.log import get_task_logger
 
 from app.celery import app as celery_app
+from app.core.config import settings
 from app.core.db import engine
 from app.models import (
     DataSource,
@@ -12,8 +16,9 @@ from app.models import (
 )
 import logging
 from app.rag.datasource import get_data_source_loader
+from app.rag.semantic_cache import retrieve_cache
 from app.repositories import data_source_repo
-from .rag_build import build_vector_index_from_document
+from .rag_build import dispatch_vector_index_from_documents
 
 
 logger = get_task_logger(__name__)
@@ -41,18 +46,56 @@ def import_documents_from_datasource(data_source_id: int):
             logger.error(f"Failed to get data source loader for data_source_id {data_source_id}")
             return
 
-        all_documents=list(loader.load_documents())
-        for document in all_documents:
-            try:
-                logger.info(f"Processing document with id {document.id}")
-                session.add(document)
-                session.commit()
-                logger.info(f"Document with id {document.id} added successfully.")
-                build_vector_index_from_document.delay(data_source_id, document.id)
-            except Exception as e:
-                logger.error(f"Error committing document {document.id}: {e}")
-                session.rollback()
-            
+        # The loader is consumed as a stream: only one batch of documents is
+        # held in memory and committed at once, then its documents are sent
+        # to the workers in smaller task batches.
+        documents = iter(loader.load_documents())
+        while batch := list(islice(documents, settings.DATA_SOURCE_IMPORT_BATCH_SIZE)):
+            document_ids = save_documents(session, batch)
+            if document_ids:
+                dispatch_vector_index_from_documents(data_source_id, document_ids)
+
+
+# Filled by the database.
+_SERVER_SIDE_COLUMNS = {"id", "created_at", "updated_at"}
+
+
+def save_documents(session: Session, documents: list[Document]) -> list[int]:
+    try:
+        # A bulk INSERT .. RETURNING of plain rows, the documents are not
+        # needed afterwards so they are kept out of the identity map.
+        rows = [
+            {
+                column.key: getattr(document, column.key)
+                for column in Document.__table__.columns
+                if column.key not in _SERVER_SIDE_COLUMNS
+            }
+            for document in documents
+        ]
+        document_ids = list(
+            session.execute(
+                insert(Document).returning(Document.id, sort_by_parameter_order=True),
+                rows,
+            ).scalars()
+        )
+        session.commit()
+        return document_ids
+    except Exception as e:
+        logger.warning(f"Failed to commit a batch of documents, committing one by one: {e}")
+        session.rollback()
+
+    document_ids = []
+    for document in documents:
+        try:
+            session.add(document)
+            session.flush()
+            document_id = document.id
+            session.commit()
+            document_ids.append(document_id)
+        except Exception as e:
+            logger.error(f"Error committing document {document.name}: {e}")
+            session.rollback()
+    return document_ids
 
 
 @celery_app.task
@@ -63,64 +106,51 @@ def purge_datasource_related_resources(data_source_id: int):
     #   - vector index
     #   - kg index
         with Session(engine) as session:
-            # Step 1: Delete all documents associated with the data source
-            document_ids = session.exec(
-                select(Document.id).where(Document.data_source_id == data_source_id)
-            ).all()
+            # The id lists are kept as subqueries, so every step is a single
+            # DELETE statement instead of a SELECT whose ids are sent back as
+            # a (potentially huge) IN list.
+            # Step 1: Find all documents associated with the data source
+            document_ids = select(Document.id).where(
+                Document.data_source_id == data_source_id
+            )
+
+            # Step 2: Delete all relationships tied to these documents
+            stmt = delete(Relationship).where(Relationship.document_id.in_(document_ids))
+            session.exec(stmt)
+            session.commit()  # Commit after deleting relationships
+            print(f"Deleted relationships for documents tied to data source {data_source_id}.")
 
-            if document_ids:
-                # Step 2: Delete all relationships tied to these documents
-                stmt = delete(Relationship).where(Relationship.document_id.in_(document_ids))
-                session.exec(stmt)
-                session.commit()  # Commit after deleting relationships
-                print(f"Deleted relationships for documents tied to data source {data_source_id}.")
-
-                # Step 3: Delete all chunks tied to these documents
-                stmt = delete(Chunk).where(Chunk.document_id.in_(document_ids))
-                session.exec(stmt)
-                session.commit()  # Commit after deleting chunks
-                print(f"Deleted chunks for documents tied to data source {data_source_id}.")
-
-                # Step 4: Delete all entities linked to these documents through relationships
-                related_entities_ids = session.exec(
-                    select(Entity.id).where(
-                        Entity.id.in_(select(Relationship.source_entity_id).where(Relationship.document_id.in_(document_ids))) |
-                        Entity.id.in_(select(Relationship.target_entity_id).where(Relationship.document_id.in_(document_ids)))
-                    )
-                ).all()
-
-                if related_entities_ids:
-                    stmt = delete(Entity).where(Entity.id.in_(related_entities_ids))
-                    session.exec(stmt)
-                    session.commit()  # Commit after deleting related entities
-                    print(f"Deleted related entities for documents tied to data source {data_source_id}.")
+            # Step 3: Delete all chunks tied to these documents
+            stmt = delete(Chunk).where(Chunk.document_id.in_(document_ids))
+            session.exec(stmt)
+            session.commit()  # Commit after deleting chunks
+            print(f"Deleted chunks for documents tied to data source {data_source_id}.")
+
+            # Step 4: Delete all entities linked to these documents through relationships
+            stmt = delete(Entity).where(
+                Entity.id.in_(select(Relationship.source_entity_id).where(Relationship.document_id.in_(document_ids))) |
+                Entity.id.in_(select(Relationship.target_entity_id).where(Relationship.document_id.in_(document_ids)))
+            )
+            session.exec(stmt)
+            session.commit()  # Commit after deleting related entities
+            print(f"Deleted related entities for documents tied to data source {data_source_id}.")
 
             # Step 5: Delete all orphaned relationships that are no longer tied to any document
-            orphaned_relationships = session.exec(
-                select(Relationship.id).where(
-                    ~Relationship.document_id.in_(select(Document.id))
-                )
-            ).all()
-
-            if orphaned_relationships:
-                stmt = delete(Relationship).where(Relationship.id.in_(orphaned_relationships))
-                session.exec(stmt)
-                session.commit()  # Commit after deleting orphaned relationships
-                print(f"Deleted orphaned relationships for data source {data_source_id}.")
+            stmt = delete(Relationship).where(
+                ~Relationship.document_id.in_(select(Document.id))
+            )
+            session.exec(stmt)
+            session.commit()  # Commit after deleting orphaned relationships
+            print(f"Deleted orphaned relationships for data source {data_source_id}.")
 
             # Step 6: Delete all orphaned entities that are no longer referenced by any relationships
-            orphaned_entity_ids = session.exec(
-                select(Entity.id).where(
-                    ~Entity.id.in_(select(Relationship.source_entity_id)) &
-                    ~Entity.id.in_(select(Relationship.target_entity_id))
-                )
-            ).all()
-
-            if orphaned_entity_ids:
-                stmt = delete(Entity).where(Entity.id.in_(orphaned_entity_ids))
-                session.exec(stmt)
-                session.commit()  # Commit after deleting orphaned entities
-                print(f"Deleted orphaned entities for data source {data_source_id}.")
+            stmt = delete(Entity).where(
+                ~Entity.id.in_(select(Relationship.source_entity_id)) &
+                ~Entity.id.in_(select(Relationship.target_entity_id))
+            )
+            session.exec(stmt)
+            session.commit()  # Commit after deleting orphaned entities
+            print(f"Deleted orphaned entities for data source {data_source_id}.")
 
             # Step 7: Delete all documents tied to the data source
             stmt = delete(Document).where(Document.data_source_id == data_source_id)
@@ -128,4 +158,7 @@ def purge_datasource_related_resources(data_source_id: int):
             session.commit()  # Commit after deleting documents
             print(f"Deleted documents for data source {data_source_id}.")
 
+            # The cached retrieve results may point to the deleted documents.
+            retrieve_cache.clear()
+
             print(f"Purged all resources for data source {data_source_id}.")
\ No newline at end of file
@@ -6,6 +6,7 @@ from celery.exceptions import MaxRetriesExceededError
 from llama_index.core.llms.llm import LLM
 import logging
 from app.celery import app as celery_app
+from app.core.config import settings
 from app.core.db import engine
 from app.models import (
     Document as DBDocument,
@@ -16,6 +17,7 @@ from app.models import (
 )
 from app.rag.build import BuildService
 from app.rag.chat_config import get_llm, get_default_llm
+from app.rag.semantic_cache import retrieve_cache
 from app.utils.dspy import get_dspy_lm_by_llama_llm
 from app.repositories import data_source_repo
 
@@ -85,7 +87,9 @@ def build_vector_index_from_document(self, data_source_id: int, document_id: int
 
             if (
                 session.exec(
-                    select(DBChunk).where(DBChunk.document_id == document_id)
+                    select(DBChunk.id)
+                    .where(DBChunk.document_id == document_id)
+                    .limit(1)
                 ).first()
                 is not None
             ):
@@ -106,13 +110,12 @@ def build_vector_index_from_document(self, data_source_id: int, document_id: int
             session.add(db_document)
             session.commit()
             logger.info(f"Document {document_id} indexed successfully")
+            # The cached retrieve results don't include the new chunks.
+            retrieve_cache.clear()
 
             data_source = data_source_repo.get(session, data_source_id)
             if data_source and data_source.build_kg_index:
-                for chunk in session.exec(
-                    select(DBChunk).where(DBChunk.document_id == document_id)
-                ):
-                    build_kg_index_from_chunk.delay(data_source_id, document_id, chunk.id)
+                dispatch_kg_index_for_document(session, data_source_id, document_id)
 
     except Exception as e:
         with Session(engine, expire_on_commit=False) as session:
@@ -197,6 +200,7 @@ def build_kg_index_from_chunk(self, data_source_id: int, document_id: int, chunk
             session.add(db_chunk)
             session.commit()
             logger.info(f"Chunk {chunk_id} indexed successfully")
+            retrieve_cache.clear()
 
     except Exception as e:
         with Session(engine, expire_on_commit=False) as session:
@@ -220,3 +224,94 @@ def build_kg_index_from_chunk(self, data_source_id: int, document_id: int, chunk
                     session.add(db_chunk)
                     session.commit()
                 raise self.retry(exc=e)
+
+
+def batched(items: list, batch_size: int = settings.CELERY_TASK_BATCH_SIZE):
+    for i in range(0, len(items), batch_size):
+        yield items[i : i + batch_size]
+
+
+# The batch tasks below run the per item tasks in-process, so a bulk (re)index
+# costs one broker message per batch instead of one per item. The batches are
+# a few items each, the worker pool still indexes them in parallel. An item
+# which fails is handed to its own task, which owns the retry policy.
+
+
+@celery_app.task
+def build_vector_index_from_documents(data_source_id: int, document_ids: list[int]):
+    for document_id in document_ids:
+        try:
+            build_vector_index_from_document(data_source_id, document_id)
+        except Exception:
+            logger.exception(f"Failed to index document {document_id} in batch, retrying alone")
+            build_vector_index_from_document.delay(data_source_id, document_id)
+
+
+@celery_app.task
+def build_kg_index_from_chunks(data_source_id: int, chunks: list[tuple[int, UUID]]):
+    for document_id, chunk_id in chunks:
+        try:
+            build_kg_index_from_chunk(data_source_id, document_id, chunk_id)
+        except Exception:
+            logger.exception(f"Failed to index chunk {chunk_id} in batch, retrying alone")
+            build_kg_index_from_chunk.delay(data_source_id, document_id, chunk_id)
+
+
+def dispatch_kg_index_for_document(
+    session: Session,
+    data_source_id: int,
+    document_id: int,
+    statuses: tuple[KgIndexStatus, ...] = (
+        KgIndexStatus.NOT_STARTED,
+        KgIndexStatus.PENDING,
+    ),
+):
+    # Only the ids are selected, not the chunk rows with their embeddings.
+    chunk_ids = session.exec(
+        select(DBChunk.id).where(
+            DBChunk.document_id == document_id,
+            DBChunk.index_status.in_(statuses),
+        )
+    ).all()
+    dispatch_kg_index_from_chunks(
+        data_source_id, [(document_id, chunk_id) for chunk_id in chunk_ids]
+    )
+
+
+@celery_app.task
+def build_kg_index_from_document(data_source_id: int, document_id: int):
+    # Sent when retrying the failed chunks, which were set to PENDING. The
+    # NOT_STARTED ones are still queued from the document's vector indexing.
+    with Session(engine) as session:
+        dispatch_kg_index_for_document(
+            session, data_source_id, document_id, (KgIndexStatus.PENDING,)
+        )
+
+
+def send_tasks(task, args_list):
+    # Publish every message through one producer (and broker connection)
+    # instead of acquiring one from the pool per `.delay()`.
+    with celery_app.producer_pool.acquire(block=True) as producer:
+        for args in args_list:
+            task.apply_async(args=args, producer=producer)
+
+
+def dispatch_vector_index_from_documents(data_source_id: int, document_ids: list[int]):
+    send_tasks(
+        build_vector_index_from_documents,
+        [(data_source_id, batch) for batch in batched(list(document_ids))],
+    )
+
+
+def dispatch_kg_index_from_chunks(data_source_id: int, chunks: list[tuple[int, UUID]]):
+    send_tasks(
+        build_kg_index_from_chunks,
+        [(data_source_id, batch) for batch in batched(list(chunks))],
+    )
+
+
+def dispatch_kg_index_from_documents(data_source_id: int, document_ids: list[int]):
+    send_tasks(
+        build_kg_index_from_document,
+        [(data_source_id, document_id) for document_id in document_ids],
+    )
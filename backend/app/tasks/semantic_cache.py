@@ -0,0 +1,22 @@
+from sqlmodel import Session
+from celery.utils.log import get_task_logger
+
+from app.celery import app as celery_app
+from app.core.db import engine
+from app.repositories import semantic_cache_repo
+from app.rag.semantic_cache import retrieve_cache
+
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task
+def maintain_semantic_cache_partitions():
+    with Session(engine) as session:
+        created = semantic_cache_repo.create_upcoming_partitions(session)
+        dropped = semantic_cache_repo.drop_expired_partitions(session)
+    logger.info(
+        f"Semantic cache partitions ensured: {created}, expired dropped: {dropped}"
+    )
+    deleted = retrieve_cache.delete_expired()
+    logger.info(f"Expired retrieve cache entries deleted: {deleted}")
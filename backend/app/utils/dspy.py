@@ -6,6 +6,7 @@ import logging
 
 import dspy
 import requests
+from requests.adapters import HTTPAdapter
 from dspy.clients.lm import LM
 from llama_index.core.base.llms.base import BaseLLM
 from llama_index.llms.openai import OpenAI
@@ -98,6 +99,12 @@ def enforce_trailing_slash(url: str):
 ##################################################################################
 # Copy from dspy.OllamaLocal but add `format = json` when sending request to ollama
 
+# Shared by every DspyOllamaLocal, a new LM is created for every task but
+# the connections to ollama are kept alive across them.
+_ollama_session = requests.Session()
+_ollama_session.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+_ollama_session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
 
 def post_request_metadata(model_name, prompt):
     """Creates a serialized request object for the Ollama API."""
@@ -201,7 +208,7 @@ class DspyOllamaLocal(LM):
         )
         tot_eval_tokens = 0
         for i in range(kwargs["n"]):
-            response = requests.post(urlstr, json=settings_dict, timeout=self.timeout_s)
+            response = _ollama_session.post(urlstr, json=settings_dict, timeout=self.timeout_s)
 
             # Check if the request was successful (HTTP status code 200)
             if response.status_code != 200:
@@ -0,0 +1,23 @@
+import hashlib
+from typing import IO
+
+# 16 bytes, the hex digest fits the 32 characters of `Document.hash`.
+DIGEST_SIZE = 16
+
+
+def _blake2b():
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+def stream_hash(file: IO[bytes]) -> str:
+    """
+    Hashes a binary file, read into one reused buffer so large uploads are
+    never loaded in memory at once.
+    """
+    return hashlib.file_digest(file, _blake2b).hexdigest()
+
+
+def content_hash(content: str | bytes) -> str:
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.blake2b(content, digest_size=DIGEST_SIZE).hexdigest()
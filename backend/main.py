@@ -7,6 +7,7 @@ import click
 import sentry_sdk
 import uvicorn
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -96,6 +97,8 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
     lifespan=lifespan,
+    # orjson encodes the (large) list responses much faster than stdlib json.
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -163,9 +166,19 @@ def runserver(host, port):
     default="default",
     help=f"SunDB AI chat engine, default=default",
 )
-def runeval(dataset, llm_provider, run_name, tidb_ai_chat_engine):
+@click.option(
+    "--log-level",
+    default="INFO",
+    type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False),
+    help="Log level of the evaluation, default=INFO",
+)
+def runeval(dataset, llm_provider, run_name, tidb_ai_chat_engine, log_level):
     from app.evaluation.evals import Evaluation
 
+    # Every chat and LLM request of the evaluation logs at debug level (httpx,
+    # openai, ...), which floods stdout on a large dataset.
+    logging.getLogger().setLevel(log_level.upper())
+
     eval = Evaluation(
         dataset_name=dataset,
         llm_provider=llm_provider,